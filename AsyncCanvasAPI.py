@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+asyncio version of the Canvas object in CanvasAPI
+
+Requires the aiohttp library.
+"""
+
+import asyncio
+import aiohttp
+
+from CanvasAPI import Canvas, SectionDirectory, SectionSelector
+
+class AsyncCanvas:
+    def __init__(self, base_url, courseID, token, concurrency=10, section_selector=None):
+        """
+        Canvas object to get and change assignments with awaitable requests
+        
+        concurrency is the most requests that are in flight at once.
+        section_selector is the SectionSelector of the sections with per section due dates.
+        The session is opened on first use, inside the running event loop.
+        """
+        
+        #add the backslash if it is missing
+        if base_url[-1] != '/':
+            base_url = base_url+'/'
+        
+        self.base_url = base_url+'api/v1/'
+        self.headers = {'Authorization': 'Bearer ' + token,
+                        'Accept-Encoding': 'gzip, deflate'}
+        self.courseID = courseID
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.sectionDirectory = None
+        self.sectionSelector = section_selector or SectionSelector()
+        self.session = None
+    
+    def __repr__(self):
+        return "Async Canvas Course: " + str(self.courseID)
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+    
+    #closes the connections held by the session
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+    
+    #gets the session, opening it if needed
+    def getSession(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self.session = aiohttp.ClientSession(headers=self.headers, connector=connector)
+        return self.session
+    
+    async def toJson(response):
+        if not response.ok:
+            print('Error in response', response.status, response.reason, await response.text())
+            return
+        else:
+            try:
+                return await response.json(content_type=None)
+            except ValueError:
+                return await response.text()
+    
+    #A request that returns the response in json format and the url of the next page
+    async def request(self, method, url, payload=None):
+        async with self.semaphore:
+            async with self.getSession().request(method, url, json=payload) as response:
+                nextUrl = None
+                if 'next' in response.links:
+                    nextUrl = str(response.links['next']['url'])
+                return await AsyncCanvas.toJson(response), nextUrl
+    
+    #A get request that returns the parameters in json format
+    async def get(self, url, payload=None):
+        return (await self.request('GET', url, payload))[0]
+    
+    #A post request that returns the parameters in json format
+    async def post(self, url, payload=None):
+        return (await self.request('POST', url, payload))[0]
+    
+    #A put request that returns the parameters in json format
+    async def put(self, url, payload=None):
+        return (await self.request('PUT', url, payload))[0]
+    
+    #A delete request that returns the parameters in json format
+    async def delete(self, url, payload=None):
+        return (await self.request('DELETE', url, payload))[0]
+    
+    async def paginate(self, url, payload=None, limit=None, key=None, per_page=100):
+        """
+        Iterates over the items of a listing, following the Link: rel="next" headers.
+        
+        Same as Canvas.paginate, the next page is requested while the items of the
+        current page are being used.
+        """
+        if 'per_page=' not in url:
+            url = url + ('&' if '?' in url else '?') + 'per_page=' + str(per_page)
+        
+        count = 0
+        page = asyncio.ensure_future(self.request('GET', url, payload))
+        while page is not None:
+            items, nextUrl = await page
+            if items is None: #error in response, already printed
+                return
+            if key is not None:
+                items = items.get(key, [])
+            
+            #start on the next page before handing out this one
+            page = None
+            if nextUrl and (limit is None or count + len(items) < limit):
+                page = asyncio.ensure_future(self.request('GET', nextUrl, payload))
+            
+            for item in items:
+                if limit is not None and count >= limit:
+                    if page is not None:
+                        page.cancel()
+                    return
+                count += 1
+                yield item
+    
+    #collects all the items of a listing into a list
+    async def getAll(self, url, payload=None, key=None):
+        return [item async for item in self.paginate(url, payload, key=key)]
+    
+    #gets the sections within a course
+    async def getSections(self, payload=None):
+        url = self.base_url + 'courses/' + self.courseID + '/sections'
+        return await self.getAll(url, payload)
+    
+    #gets the section directory for the course, only fetching it from Canvas once
+    async def getSectionDirectory(self):
+        if self.sectionDirectory is None:
+            self.sectionDirectory = SectionDirectory(await self.getSections(), self.sectionSelector)
+        return self.sectionDirectory
+    
+    #forgets the section directory so the next use fetches it again
+    def invalidateSections(self):
+        self.sectionDirectory = None
+    
+    #gets the assignments, and with quizzes also the quizzes with their bulk overrides, all listings are fetched at the same time
+    async def getAllAssignments(self, payload=None, quizzes=False):
+        quiz_url = self.base_url + 'courses/'+self.courseID+'/quizzes'
+        assignment_url = self.base_url + 'courses/'+self.courseID+'/assignments?all_dates=1&include[]=overrides'
+        
+        if not quizzes:
+            return [], await self.getAll(assignment_url, payload)
+        
+        q, quizOverrides, a = await asyncio.gather(self.getAll(quiz_url, payload), self.getQuizOverrides(), self.getAll(assignment_url, payload))
+        quizOverrides = Canvas.groupQuizOverrides(quizOverrides)
+        for quiz in q:
+            quiz['overrides'] = quizOverrides.get(quiz['id'], [])
+        return q,a
+    
+    #gets an individual assignment given its ID
+    async def getAssignment(self, assignmentID, payload=None):
+        assignmentID = str(assignmentID)
+        url = self.base_url + 'courses/' + self.courseID + '/assignments/' + assignmentID
+        return await self.get(url, payload)
+    
+    #edits an individual assignment given its ID
+    async def editAssignment(self, assignmentID, payload=None):
+        assignmentID = str(assignmentID)
+        url = self.base_url + 'courses/' + self.courseID + '/assignments/' + assignmentID
+        return await self.put(url, payload)
+    
+    #gets a assignment overrides given its ID
+    async def getAssignmentOverrides(self, assignmentID, payload=None):
+        assignmentID = str(assignmentID)
+        url = self.base_url + 'courses/' + self.courseID + '/assignments/' + assignmentID + '/overrides'
+        return await self.getAll(url, payload)
+    
+    #gets the overrides of all assignments in one listing, grouped by assignment ID
+    async def getAllAssignmentOverrides(self, payload=None):
+        url = self.base_url + 'courses/' + self.courseID + '/assignments?include[]=overrides'
+        return Canvas.groupOverrides(await self.getAll(url, payload))
+    
+    #creates an assignment override given assignment ID and override info
+    async def makeAssignmentOverride(self, assignmentID, payload):
+        assignmentID = str(assignmentID)
+        url = self.base_url + 'courses/' + self.courseID + '/assignments/' + assignmentID + '/overrides'
+        return await self.post(url, payload)
+    
+    #edits an assignment override given assignment and override IDs
+    async def editAssignmentOverride(self, assignmentID, overrideID, payload):
+        assignmentID = str(assignmentID)
+        overrideID = str(overrideID)
+        url = self.base_url + 'courses/' + self.courseID + '/assignments/' + assignmentID + '/overrides/'+ overrideID
+        return await self.put(url, payload)
+    
+    #deletes an assignment override given assignment and override IDs
+    async def deleteAssignmentOverride(self, assignmentID, overrideID, payload=None):
+        assignmentID = str(assignmentID)
+        overrideID = str(overrideID)
+        url = self.base_url + 'courses/' + self.courseID + '/assignments/' + assignmentID + '/overrides/'+ overrideID
+        return await self.delete(url, payload)
+    
+    #gets an individual quiz given its ID
+    async def getQuiz(self, quizID, payload=None):
+        quizID = str(quizID)
+        url = self.base_url + 'courses/' + self.courseID + '/quizzes/' + quizID
+        return await self.get(url, payload)
+    
+    #creates an individual quiz given parameters
+    async def makeQuiz(self, quizID, payload):
+        url = self.base_url + 'courses/' + self.courseID + '/quizzes/'
+        return await self.post(url, payload)
+    
+    #edits an individual quiz given its ID
+    async def editQuiz(self, quizID, payload=None):
+        quizID = str(quizID)
+        url = self.base_url + 'courses/' + self.courseID + '/quizzes/' + quizID
+        return await self.put(url, payload)
+    
+    #gets overrides for all quizzes
+    async def getQuizOverrides(self, payload=None):
+        url = self.base_url + 'courses/' + self.courseID + '/quizzes/assignment_overrides'
+        return await self.getAll(url, payload, key='quiz_assignment_overrides')
@@ -7,12 +7,84 @@ Created on Thu Jan 17 17:45:08 2019
 contact: clnguyen2@wisc.edu
 """
 
+import re
 import requests
+import requests.adapters
+import time
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ResponseCache import ResponseCache
+from JsonProjection import projectList, makeFields
+
+#most overrides sent in one request to the batch override endpoints
+override_batch_limit = 50
+
+#fields kept from the section listing
+section_fields = ['id', 'name']
+
+#bytes read at a time from a listing that is projected while it streams in
+stream_chunk_size = 64*1024
+
+#GraphQL query of the assignments of a course with their overrides, the sections are only asked for on the first page
+graphql_query = """
+query CourseAssignments($courseId: ID!, $after: String, $pageSize: Int, $withSections: Boolean!) {
+  course(id: $courseId) {
+    sectionsConnection @include(if: $withSections) {
+      nodes { _id name }
+      pageInfo { hasNextPage }
+    }
+    assignmentsConnection(first: $pageSize, after: $after) {
+      nodes {
+        _id name dueAt unlockAt lockAt published muted submissionTypes
+        assignmentOverrides {
+          nodes { _id title dueAt unlockAt lockAt set { __typename ... on Section { _id } } }
+          pageInfo { hasNextPage }
+        }
+      }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+}
+"""
+
+class Cancelled(Exception):
+    """
+    Raised by a Canvas object when its work was cancelled
+    """
+    pass
+
+class Uncancelled:
+    """
+    Context of Canvas.uncancelled, it can be entered again by the same thread
+    """
+    def __init__(self, canvas):
+        self.finishing = canvas.finishing
+    
+    def __enter__(self):
+        self.finishing.depth = getattr(self.finishing, 'depth', 0) + 1
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.finishing.depth -= 1
 
 class Canvas:
-    def __init__(self, base_url, courseID, token):
+    def __init__(self, base_url, courseID, token, pool_size=10, cache=None, session=None, progress=None, metrics=None, backend='rest', section_selector=None):
         """
         Canvas object to get and change assignments
+        
+        Requests go through one session so connections are kept alive and reused.
+        pool_size is the number of connections kept open to the Canvas host.
+        cache is an optional ResponseCache that GET responses are revalidated against.
+        session is an optional session from Canvas.makeSession to share with other
+        Canvas objects, it is not closed by this object.
+        progress is an optional editor.Progress that is told about fetched assignments
+        and written changes, and that can cancel the object between requests.
+        metrics is an optional RequestMetrics that every request is recorded in.
+        backend is 'rest' or 'graphql', the way getAllAssignments fetches the assignments.
+        The graphql backend falls back to rest if its query fails.
+        section_selector is the SectionSelector that picks the sections with per section
+        due dates, the lab sections if it is not given.
         """
         
         #add the backslash if it is missing
@@ -20,12 +92,55 @@ class Canvas:
             base_url = base_url+'/'
         
         self.base_url = base_url+'api/v1/'
-        self.headers = {'Authorization Bearer':token}
+        self.graphql_url = base_url+'api/graphql'
+        self.backend = backend
+        self.headers = {'Authorization': 'Bearer ' + token,
+                        'Accept-Encoding': 'gzip, deflate',
+                        'Connection': 'keep-alive'}
         self.courseID = courseID
+        self.sectionDirectory = None
+        self.sectionSelector = section_selector or SectionSelector()
+        self.cache = cache
+        self.progress = progress
+        self.metrics = metrics
+        
+        #number of requests sent by this object
+        self.requestCount = 0
+        self.countLock = threading.Lock()
+        
+        #threads that are finishing work that must not be cut off by a cancel, see uncancelled
+        self.finishing = threading.local()
+        
+        self.ownsSession = session is None
+        if session is None:
+            session = Canvas.makeSession(pool_size)
+        self.session = session
     
     def __repr__(self):
         return "Canvas Course: " + str(self.courseID)
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    #makes a session with a pool of pool_size connections kept open to the host
+    def makeSession(pool_size=10):
+        session = requests.Session()
+        session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    #closes the connections held by the session
+    def close(self):
+        if self.ownsSession:
+            self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+    
     def toJson(response):
         if not response.ok:
             print('Error in response', response.status_code, response.reason, response.text)
@@ -36,42 +151,302 @@ class Canvas:
             except:
                 return response.text
     
+    #the requests of the calling thread are not cancelled while this is entered, ie. with canvas.uncancelled():
+    #used for changes that would leave an assignment half changed if they were cut off
+    def uncancelled(self):
+        return Uncancelled(self)
+    
+    #sends a request through the session, every request of the object goes through here
+    #with stream, the body is left to be read from the response as it arrives
+    def request(self, method, url, payload=None, headers=None, stream=False):
+        if self.progress is not None and not getattr(self.finishing, 'depth', 0):
+            self.progress.check() #raises Cancelled if the work was cancelled
+        with self.countLock:
+            self.requestCount += 1
+        request_headers = dict(self.headers)
+        if headers:
+            request_headers.update(headers)
+        if self.metrics is None:
+            response = self.session.request(method, url, json=payload, headers=request_headers, stream=stream)
+        else:
+            response = self.timedRequest(method, url, payload, request_headers, stream)
+        if self.progress is not None and method != 'GET':
+            self.progress.wrote()
+        return response
+    
+    #sends a request and records it in the metrics, also when it fails
+    def timedRequest(self, method, url, payload, headers, stream=False):
+        response = None
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, json=payload, headers=headers, stream=stream)
+            return response
+        finally:
+            sent = 0
+            if response is not None and response.request.body is not None:
+                sent = len(response.request.body)
+            if stream and response is not None:
+                #a streamed response is recorded once its body was read
+                response.iter_content = self.meteredContent(response, method, url, start, sent)
+            else:
+                self.metrics.record(method, url, response, time.perf_counter() - start, sent)
+    
+    #the iter_content of a streamed response, counting the bytes read and recording the request after the last one
+    def meteredContent(self, response, method, url, start, sent):
+        iter_content = response.iter_content
+        def content(chunk_size=1, decode_unicode=False):
+            received = 0
+            try:
+                for chunk in iter_content(chunk_size, decode_unicode):
+                    received += len(chunk)
+                    yield chunk
+            finally:
+                self.metrics.record(method, url, response, time.perf_counter() - start, sent, received)
+        return content
+    
     #A get request that returns the parameters in json format
     def get(self, url, payload=None):
-        return Canvas.toJson(requests.get(url, headers=self.headers, json=payload))
+        return self.getPage(url, payload)[0]
     
     #A post request that returns the parameters in json format
     def post(self, url, payload=None):    
-        return Canvas.toJson(requests.post(url, headers=self.headers, json=payload))
+        if self.cache is not None:
+            self.cache.invalidate(url)
+        return Canvas.toJson(self.request('POST', url, payload))
     
     #A put request that returns the parameters in json format
     def put(self, url, payload=None):
-        return Canvas.toJson(requests.put(url, headers=self.headers, json=payload))
+        if self.cache is not None:
+            self.cache.invalidate(url)
+        return Canvas.toJson(self.request('PUT', url, payload))
     
     #A delete request that returns the parameters in json format
     def delete(self, url, payload=None):
-        return Canvas.toJson(requests.delete(url, headers=self.headers, json=payload))
-
-    #gets the sections within a course
-    def getSections(self, payload=None):
+        if self.cache is not None:
+            self.cache.invalidate(url)
+        return Canvas.toJson(self.request('DELETE', url, payload))
+    
+    #reads a listing response, with fields only the wanted fields are kept as it streams in, see JsonProjection
+    def readListing(response, fields=None):
+        if fields is None or not response.ok:
+            return Canvas.toJson(response)
+        return list(projectList(response.iter_content(stream_chunk_size), fields))
+    
+    #A get request for one page of a listing that also returns the url of the next page
+    #with a cache, a saved response is used if the server answers 304 Not Modified
+    #with fields, the page is a listing of objects that only keep the wanted fields
+    def getPage(self, url, payload=None, fields=None):
+        stream = fields is not None
+        if self.cache is None:
+            response = self.request('GET', url, payload, stream=stream)
+            nextUrl = response.links.get('next', {}).get('url')
+            return Canvas.readListing(response, fields), nextUrl
+        
+        #projected pages are cached apart from the full pages of the same url
+        key = payload
+        if stream:
+            key = {'payload': payload, 'fields': fields}
+        entry = self.cache.lookup(url, key)
+        response = self.request('GET', url, payload, ResponseCache.validators(entry), stream)
+        if response.status_code == 304 and entry is not None:
+            response.content #releases the connection of a streamed response
+            self.cache.touch(url, key)
+            return entry['data'], entry['next']
+        
+        nextUrl = response.links.get('next', {}).get('url')
+        data = Canvas.readListing(response, fields)
+        if response.ok:
+            self.cache.store(url, key, response, data, nextUrl)
+        return data, nextUrl
+    
+    def paginate(self, url, payload=None, limit=None, key=None, per_page=100, fields=None):
+        """
+        Iterates over the items of a listing, following the Link: rel="next" headers.
+        
+        The next page is fetched in the background while the items of the current
+        page are being used.
+        
+        params:
+            url: url of the listing
+            payload: json payload sent with every page request
+            limit: maximum number of items to yield, None for all of them
+            key: for listings that wrap the items in an object, the key of the item list
+            per_page: number of items asked for on each page
+            fields: the wanted fields of the items, as a list of names or a dictionary
+                    for nested fields, the other fields are dropped as the page streams in
+        """
+        fields = makeFields(fields)
+        if 'per_page=' not in url:
+            url = url + ('&' if '?' in url else '?') + 'per_page=' + str(per_page)
+        
+        count = 0
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page = executor.submit(self.getPage, url, payload, fields)
+            while page is not None:
+                items, nextUrl = page.result()
+                if items is None: #error in response, already printed
+                    return
+                if key is not None:
+                    items = items.get(key, [])
+                
+                #start on the next page before handing out this one
+                page = None
+                if nextUrl and (limit is None or count + len(items) < limit):
+                    page = executor.submit(self.getPage, nextUrl, payload, fields)
+                
+                for item in items:
+                    if limit is not None and count >= limit:
+                        return
+                    count += 1
+                    yield item
+    
+    #gets the sections within a course, with fields only the wanted fields of each section
+    def getSections(self, payload=None, fields=None):
         url = self.base_url + 'courses/' + self.courseID + '/sections'
-        return self.get(url, payload)
+        return list(self.paginate(url, payload, fields=fields))
+    
+    #gets the section directory for the course, only fetching it from Canvas once
+    def getSectionDirectory(self):
+        if self.sectionDirectory is None:
+            self.sectionDirectory = SectionDirectory(self.getSections(fields=section_fields), self.sectionSelector)
+        return self.sectionDirectory
+    
+    #forgets the section directory so the next use fetches it again
+    def invalidateSections(self):
+        self.sectionDirectory = None
     
     #gets all quizzes and assignments
-    def getAllAssignments(self, payload=None):
-        quiz_url = self.base_url + 'courses/'+self.courseID+'/quizzes?per_page=100'
-        assignment_url = self.base_url + 'courses/'+self.courseID+'/assignments?all_dates=1&per_page=100'
+    def getAllAssignments(self, payload=None, quizzes=False, fields=None):
+        """
+        Gets the assignments, and with quizzes also the quizzes, of the course
+        
+        Returns the quiz and assignment listings. The quiz listing is only fetched
+        when quizzes is True and is empty otherwise. Each quiz gets the overrides
+        of the bulk quiz override listing, fetched with one request, as 'overrides'.
+        With fields, the assignments of the REST listing only keep the wanted fields,
+        see paginate.
+        """
+        quiz_url = self.base_url + 'courses/'+self.courseID+'/quizzes'
+        assignment_url = self.base_url + 'courses/'+self.courseID+'/assignments?all_dates=1&include[]=overrides'
+        
+        q = []
+        if quizzes:
+            quizOverrides = Canvas.groupQuizOverrides(self.getQuizOverrides())
+            for quiz in self.paginate(quiz_url, payload):
+                quiz['overrides'] = quizOverrides.get(quiz['id'], [])
+                q.append(quiz)
         
-        q = self.get(quiz_url, payload)
-        a = self.get(assignment_url, payload)
+        a = None
+        if self.backend == 'graphql':
+            a = self.getAllAssignmentsGraphQL()
+            if a is None:
+                print('GraphQL query failed, getting the assignments with REST')
+        
+        if a is None:
+            a = []
+            for assignment in self.paginate(assignment_url, payload, fields=fields):
+                a.append(assignment)
+                if self.progress is not None:
+                    self.progress.step()
         return q,a
     
+    #sends a GraphQL query, returns the data or None if the query failed
+    def graphql(self, query, variables=None):
+        result = Canvas.toJson(self.request('POST', self.graphql_url, {'query': query, 'variables': variables or {}}))
+        if not isinstance(result, dict) or result.get('errors') or not result.get('data'):
+            if isinstance(result, dict) and result.get('errors'):
+                print('Error in GraphQL query', result['errors'])
+            return None
+        return result['data']
+    
+    def getAllAssignmentsGraphQL(self, per_page=100):
+        """
+        Gets the assignments with their overrides and the sections of the course with GraphQL
+        
+        The assignments come in pages of per_page with all their overrides, so a
+        course takes one request per page instead of the REST listings. The sections
+        come with the first page and become the section directory.
+        Returns the assignments in the format of the REST assignment listing with
+        include[]=overrides, or None if a query failed.
+        """
+        assignments = []
+        after = None
+        withSections = True
+        while True:
+            data = self.graphql(graphql_query, {'courseId': self.courseID, 'after': after, 'pageSize': per_page, 'withSections': withSections})
+            if data is None or data.get('course') is None:
+                return None
+            course = data['course']
+            
+            if withSections:
+                sections = course['sectionsConnection']
+                if sections['pageInfo']['hasNextPage']:
+                    self.sectionDirectory = SectionDirectory(self.getSections(fields=section_fields), self.sectionSelector)
+                else:
+                    self.sectionDirectory = SectionDirectory([{'id': int(section['_id']), 'name': section['name']} for section in sections['nodes']], self.sectionSelector)
+                withSections = False
+            
+            page = course['assignmentsConnection']
+            for node in page['nodes']:
+                assignments.append(self.graphqlAssignment(node))
+                if self.progress is not None:
+                    self.progress.step()
+            
+            if not page['pageInfo']['hasNextPage']:
+                return assignments
+            after = page['pageInfo']['endCursor']
+    
+    #converts an assignment of the GraphQL query to the format of the REST assignment listing
+    def graphqlAssignment(self, node):
+        ID = int(node['_id'])
+        assignment = {'id': ID, 'name': node['name'], 'due_at': Canvas.restDate(node['dueAt']),
+                      'unlock_at': Canvas.restDate(node['unlockAt']), 'lock_at': Canvas.restDate(node['lockAt']),
+                      'published': node['published'], 'muted': bool(node.get('muted')),
+                      'is_quiz_assignment': 'online_quiz' in (node.get('submissionTypes') or [])}
+        
+        #an assignment with more overrides than fit in the query gets them from REST
+        overrides = node['assignmentOverrides']
+        if overrides['pageInfo']['hasNextPage']:
+            assignment['overrides'] = self.getAssignmentOverrides(ID)
+            return assignment
+        
+        #only the overrides of the selected sections are kept
+        assignment['overrides'] = []
+        for override in overrides['nodes']:
+            if (override.get('set') or {}).get('__typename') != 'Section':
+                continue
+            section = int(override['set']['_id'])
+            if section not in self.sectionDirectory.position:
+                continue
+            assignment['overrides'].append({'id': int(override['_id']), 'assignment_id': ID, 'title': override['title'],
+                                            'course_section_id': section, 'due_at': Canvas.restDate(override['dueAt']),
+                                            'unlock_at': Canvas.restDate(override['unlockAt']), 'lock_at': Canvas.restDate(override['lockAt'])})
+        return assignment
+    
+    #converts a GraphQL date, which has a time zone offset, to the UTC format of the REST API
+    def restDate(value):
+        if not value:
+            return None
+        date = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return date.astimezone(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    
     #gets an individual assignment given its ID
     def getAssignment(self, assignmentID, payload=None):
         assignmentID = str(assignmentID)
         url = self.base_url + 'courses/' + self.courseID + '/assignments/' + assignmentID
         return self.get(url, payload)
     
+    #gets some assignments with their overrides, asking for override_batch_limit of them per listing
+    def getAssignmentsById(self, assignmentIDs, payload=None, fields=None):
+        assignmentIDs = [int(ID) for ID in assignmentIDs]
+        wanted = set(assignmentIDs)
+        assignments = []
+        for start in range(0, len(assignmentIDs), override_batch_limit):
+            url = self.base_url + 'courses/' + self.courseID + '/assignments?all_dates=1&include[]=overrides'
+            url += ''.join('&assignment_ids[]=' + str(ID) for ID in assignmentIDs[start:start + override_batch_limit])
+            assignments += [a for a in self.paginate(url, payload, fields=fields) if a['id'] in wanted]
+        return assignments
+    
     #creates an individual assignment given parameters
     def makeAssignment(self, payload):
         url = self.base_url + 'courses/' + self.courseID + '/assignments/'
@@ -83,25 +458,96 @@ class Canvas:
         url = self.base_url + 'courses/' + self.courseID + '/assignments/' + assignmentID
         return self.put(url, payload)
     
+    #updates the dates of many assignments and their overrides at once
+    #returns a Progress object of the job that makes the updates
+    def bulkUpdateAssignments(self, payload):
+        url = self.base_url + 'courses/' + self.courseID + '/assignments/bulk_update'
+        return self.put(url, payload)
+    
+    #gets a Progress object given its ID
+    def getProgress(self, progressID):
+        url = self.base_url + 'progress/' + str(progressID)
+        return self.get(url)
+    
     #gets a assignment overrides given its ID 
     def getAssignmentOverrides(self, assignmentID, payload=None):
         assignmentID = str(assignmentID)        
         url = self.base_url + 'courses/' + self.courseID + '/assignments/' + assignmentID + '/overrides'
-        return self.get(url, payload)
-
+        return list(self.paginate(url, payload))
+    
+    #gets the overrides of all assignments in one listing, grouped by assignment ID
+    #assignments already fetched with include[]=overrides can be given to skip the request
+    def getAllAssignmentOverrides(self, assignments=None, payload=None):
+        if assignments is None:
+            url = self.base_url + 'courses/' + self.courseID + '/assignments?include[]=overrides'
+            assignments = self.paginate(url, payload)
+        return Canvas.groupOverrides(assignments)
+    
+    #groups the overrides of an assignment listing fetched with include[]=overrides by assignment ID
+    def groupOverrides(assignments):
+        overrides = {}
+        for assignment in assignments or []:
+            overrides[assignment['id']] = assignment.get('overrides') or []
+        return overrides
+    
     #creates an assignment override given assignment ID and override info 
     def makeAssignmentOverride(self, assignmentID, payload):
         assignmentID = str(assignmentID)
         url = self.base_url + 'courses/' + self.courseID + '/assignments/' + assignmentID + '/overrides'
         return self.post(url, payload)
     
+    #edits an assignment override given assignment and override IDs
+    def editAssignmentOverride(self, assignmentID, overrideID, payload):
+        assignmentID = str(assignmentID)
+        overrideID = str(overrideID)
+        url = self.base_url + 'courses/' + self.courseID + '/assignments/' + assignmentID + '/overrides/'+ overrideID
+        return self.put(url, payload)
+    
     #deletes an assignment override given assignment and override IDs
     def deleteAssignmentOverride(self, assignmentID, overrideID, payload=None):
         assignmentID = str(assignmentID)        
         overrideID = str(overrideID)
         url = self.base_url + 'courses/' + self.courseID + '/assignments/' + assignmentID + '/overrides/'+ overrideID
         return self.delete(url, payload)
-
+    
+    def makeAssignmentOverrides(self, overrides):
+        """
+        Creates overrides of many assignments with the batch override endpoint
+        
+        Returns the created override for each override given, None for the overrides
+        of a request that failed. Canvas creates all overrides of a request or none.
+        
+        params:
+            overrides: override values that each also have the assignment_id
+        """
+        url = self.base_url + 'courses/' + self.courseID + '/assignments/overrides'
+        return self.batchOverrides(self.post, url, overrides)
+    
+    def editAssignmentOverrides(self, overrides):
+        """
+        Edits overrides of many assignments with the batch override endpoint
+        
+        Returns the edited override for each override given, None for the overrides
+        of a request that failed. Canvas edits all overrides of a request or none.
+        
+        params:
+            overrides: override values that each also have the id and assignment_id
+        """
+        url = self.base_url + 'courses/' + self.courseID + '/assignments/overrides'
+        return self.batchOverrides(self.put, url, overrides)
+    
+    #sends overrides to a batch override endpoint, at most override_batch_limit in a request
+    def batchOverrides(self, send, url, overrides):
+        results = []
+        for start in range(0, len(overrides), override_batch_limit):
+            chunk = overrides[start:start + override_batch_limit]
+            result = send(url, {'assignment_overrides': chunk})
+            if isinstance(result, list) and len(result) == len(chunk):
+                results += result
+            else:
+                results += [None] * len(chunk)
+        return results
+    
     #gets an individual quiz given its ID  
     def getQuiz(self, quizID, payload=None):
         quizID = str(quizID)
@@ -122,14 +568,101 @@ class Canvas:
     #gets overrides for all quizzes
     def getQuizOverrides(self, payload=None):
         url = self.base_url + 'courses/' + self.courseID + '/quizzes/assignment_overrides'
-        return self.get(url, payload)
+        return list(self.paginate(url, payload, key='quiz_assignment_overrides'))
+    
+    #groups the bulk quiz override listing by quiz ID, leaving out the base dates of the quizzes
+    def groupQuizOverrides(quizOverrides):
+        overrides = {}
+        for entry in quizOverrides or []:
+            overrides[entry['quiz_id']] = [date for date in entry.get('due_dates') or [] if not date.get('base')]
+        return overrides
+    
     
+
+class SectionSelector():
+    def __init__(self, pattern='lab', ids=None, predicate=None):
+        """
+        Picks the sections of a course that get per section due dates
+        
+        With ids, the sections with those IDs are picked. Otherwise the sections with
+        a name matching the regular expression pattern are picked, ignoring case, or
+        all of them if pattern is None. With predicate, a section is only picked if
+        predicate(section) is also true. The default picks the lab sections.
+        
+        params:
+            pattern: regular expression searched for in the section names
+            ids: the IDs of the sections to pick
+            predicate: a function of a section dictionary that returns True to pick it
+        """
+        self.pattern = re.compile(pattern, re.IGNORECASE) if pattern is not None else None
+        self.ids = set(int(ID) for ID in ids) if ids is not None else None
+        self.predicate = predicate
+    
+    def __repr__(self):
+        if self.ids is not None:
+            return "Section Selector: ids " + ', '.join(str(ID) for ID in sorted(self.ids))
+        return "Section Selector: " + (self.pattern.pattern if self.pattern is not None else 'all sections')
     
+    #returns True if the section is picked
+    def __call__(self, section):
+        if self.ids is not None:
+            picked = section['id'] in self.ids
+        else:
+            picked = self.pattern is None or self.pattern.search(section['name']) is not None
+        return picked and (self.predicate is None or bool(self.predicate(section)))
+
+class SectionDirectory():
+    def __init__(self, sections, selector=None):
+        """
+        Sections of a course indexed by section id and section name
+        
+        selector is the SectionSelector of the sections with per section due dates,
+        it is applied once here. The default picks the lab sections.
+        """
+        if not sections:
+            sections = []
+        if selector is None:
+            selector = SectionSelector()
+        self.selector = selector
+        self.sections = Assignment.filterData(sections, ['name','id'])
+        self.byId = {}
+        self.byName = {}
+        for section in self.sections:
+            self.byId[section['id']] = section
+            self.byName[section['name']] = section
+        
+        #the selected sections and the position of each one, used to store section dates in lists
+        self.labSections = [section for section in self.sections if selector(section)]
+        self.position = {}
+        for idx, section in enumerate(self.labSections):
+            self.position[section['id']] = idx
+    
+    def __repr__(self):
+        return "Section Directory: " + str(len(self.sections)) + " sections"
+    
+    def __iter__(self):
+        return iter(self.sections)
+    
+    def __len__(self):
+        return len(self.sections)
+    
+    #returns the sections used for per section due dates, picked by the selector
+    def labs(self):
+        return self.labSections
+
 
 class Assignment():
-    def __init__(self, name, due_at, ID, overrides, muted, published, unlock_at, lock_at, canvas):
+    #attributes are kept in slots instead of a dictionary for each assignment
+    __slots__ = ['name', 'due', 'id', 'overrides', 'muted', 'published', 'unlock', 'lock',
+                 'canvas', 'sectionDirectory', 'sectionDates', 'overrideIds']
+    
+    def __init__(self, name, due_at, ID, overrides, muted, published, unlock_at, lock_at, canvas, sections=None):
         """
         Creates an assignment object with properties of interest
+        
+        sections is the SectionDirectory of the course. If it is not given, the
+        directory cached on the canvas object is used.
+        The overrides are parsed the first time a section date is needed.
         """
         self.name = name
         self.due = due_at
@@ -140,78 +673,109 @@ class Assignment():
         self.unlock = unlock_at
         self.lock = lock_at
         self.canvas= canvas
-        self.parseOverrides()
+        if sections is None:
+            sections = canvas.getSectionDirectory()
+        self.sectionDirectory = sections
+        self.sectionDates = None
+        self.overrideIds = None
         
     #gets course section info for the assignment
     def getSectionInfo(self):
-        sections = self.canvas.getSections()
-        sections = Assignment.filterData(sections, ['name','id'])
-        sectionList = []
-        
-        for section in sections:
-            if 'lab' in section['name'].lower():
-                sectionList.append(section)
-        
-        return sectionList
+        return self.sectionDirectory.labs()
                 
     #formats the overrides in a cohesive manner for processing
+    #the override date and ID of each section are kept in lists by the position of the section
     def parseOverrides(self):
         
         #if no overrides, each section takes the due date of the overall
-        self.sections={}
-        
-        secList = self.getSectionInfo()
-        for sec in secList:
-            self.sections[sec['id']]= {'name':sec['name']}
+        count = len(self.getSectionInfo())
+        self.sectionDates = [None] * count
+        self.overrideIds = [None] * count
             
         if self.overrides:
+            position = self.sectionDirectory.position
             for override in self.overrides:
-                self.sections[override['course_section_id']]['date'] = override['due_at']
-                self.sections[override['course_section_id']]['id'] = override['id']
+                idx = position[override['course_section_id']]
+                self.sectionDates[idx] = override['due_at']
+                self.overrideIds[idx] = override['id']
+    
+    #gets the position of a section in the section lists, parsing the overrides if needed
+    def sectionPosition(self, section):
+        if self.overrideIds is None:
+            self.parseOverrides()
+        return self.sectionDirectory.position[section]
+    
+    #returns the IDs of the sections of the assignment
+    def sectionIds(self):
+        return [section['id'] for section in self.getSectionInfo()]
+    
+    #returns the name of a section of the assignment
+    def sectionName(self, section):
+        return self.sectionDirectory.byId[section]['name']
+    
+    #returns True if the section has an override
+    def hasOverride(self, section):
+        return self.overrideIds[self.sectionPosition(section)] is not None
+    
+    #returns the ID of the override of a section, None if it has none
+    def overrideId(self, section):
+        return self.overrideIds[self.sectionPosition(section)]
+    
+    #returns the due date of the override of a section, None if it has none
+    def sectionDate(self, section):
+        return self.sectionDates[self.sectionPosition(section)]
+    
+    #returns the sections as a dictionary of section ID to name, override date and override ID
+    #sections without an override have no date or ID
+    @property
+    def sections(self):
+        sections = {}
+        for section in self.getSectionInfo():
+            sections[section['id']] = {'name': section['name']}
+            if self.hasOverride(section['id']):
+                sections[section['id']]['date'] = self.sectionDate(section['id'])
+                sections[section['id']]['id'] = self.overrideId(section['id'])
+        return sections
+    
+    #the value of a date key, an empty string if there is no date
+    def dateValue(date):
+        return date if date else ''
+    
+    #accessor of each string key of get, the columns of the TSV and the keys compare uses
+    getters = {
+        'name': lambda assignment: assignment.name,
+        'id': lambda assignment: assignment.id,
+        'overrides': lambda assignment: assignment.overrides,
+        'muted': lambda assignment: assignment.muted,
+        'published': lambda assignment: assignment.published,
+        'due': lambda assignment: Assignment.dateValue(assignment.due),
+        'due_at': lambda assignment: Assignment.dateValue(assignment.due),
+        'unlock': lambda assignment: Assignment.dateValue(assignment.unlock),
+        'unlock_at': lambda assignment: Assignment.dateValue(assignment.unlock),
+        'lock': lambda assignment: Assignment.dateValue(assignment.lock),
+        'lock_at': lambda assignment: Assignment.dateValue(assignment.lock),
+    }
     
     #returns the value of the requested key of the assignment object
     #for dates, if the object is None, then return an empty string
     def get(self, key):
         if type(key) == str:
-            if 'name' in key.lower():
-                return self.name
-            elif 'due' in key.lower():
-                if self.due:
-                    return self.due
-                else:
-                    return ''
-            elif 'id' == key.lower():
-                return self.id
-            elif 'override' in key.lower():
-                return self.overrides
-            elif 'mute' in key.lower():
-                return self.muted
-            elif 'publish' in key.lower():
-                return self.published
-            elif 'unlock' in key.lower():
-                if self.unlock:
-                    return self.unlock
-                else:
-                    return ''
-            elif 'lock' in key.lower():
-                if self.lock:
-                    return self.lock
-                else:
-                    return ''
-            else:
+            accessor = Assignment.getters.get(key)
+            if accessor is None:
                 print(key)
                 raise KeyError
+            return accessor(self)
         elif type(key) == int:   
-            if key not in self.sections:
+            if key not in self.sectionDirectory.position:
                 raise KeyError
-            try: 
-                if self.sections[key]['date']:
-                    return self.sections[key]['date']
-            except KeyError: 
-                if self.due:
-                    return self.due
-                else:
-                    return ''
+            idx = self.sectionPosition(key)
+            if self.overrideIds[idx] is not None:
+                if self.sectionDates[idx]:
+                    return self.sectionDates[idx]
+            elif self.due:
+                return self.due
+            else:
+                return ''
         else:
             print(key)
             raise KeyError
@@ -229,18 +793,21 @@ class Assignment():
             #None and '' mean no date
             try:
                 for section in sections:
+                    idx = self.sectionPosition(section)
+                    date = self.sectionDates[idx]
+                    
                     #if the section had no previous due date, ensure the new section has no due date or else return false
-                    if 'date' not in self.sections[section]:
+                    if self.overrideIds[idx] is None:
                         if sections[section]=='':
                             continue
                         elif sections[section]!='':
                             return False
                     
-                    elif self.sections[section]['date'] == None and sections[section] == '':
+                    elif date == None and sections[section] == '':
                         continue
-                    elif self.sections[section]['date'] == '' and sections[section] == '':
+                    elif date == '' and sections[section] == '':
                         continue 
-                    elif self.sections[section]['date'] != sections[section]:
+                    elif date != sections[section]:
                         return False
                 else: return True
             
@@ -286,8 +853,9 @@ class Assignment():
         str_rep = str(self.name) + "\n\tdue_date: \n\t\t" + str(self.due) + "\n\tsections:\n"
         
         #loop through and list sections
-        for sect_id in self.sections:
-            section = self.sections[sect_id]
+        sections = self.sections
+        for sect_id in sections:
+            section = sections[sect_id]
             str_rep = str_rep + "\t\t" + section['name'] + "-> "
             #if section has due date, add due date
             if 'date' in section:
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local SQLite store of the course snapshots made by download and upload
+
+Each course keeps its sections, assignments, and overrides from the last sync in
+indexed tables, so snapshots can be queried across courses, like the assignments
+due in a week, and compared to a TSV with set operations in SQL.
+Dates are kept in the UTC format of the REST API, which sorts like the dates do.
+Only the overrides of the sections picked by the SectionSelector are kept, so a
+snapshot is only used with the same sections picked.
+"""
+
+import time
+import sqlite3
+import datetime
+import threading
+
+from CanvasAPI import Assignment, SectionDirectory
+
+schema = """
+CREATE TABLE IF NOT EXISTS courses (
+    id TEXT PRIMARY KEY,
+    hostname TEXT,
+    saved REAL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    course_id TEXT,
+    id INTEGER,
+    name TEXT,
+    PRIMARY KEY (course_id, id)
+);
+CREATE TABLE IF NOT EXISTS picked_sections (
+    course_id TEXT,
+    section_id INTEGER,
+    PRIMARY KEY (course_id, section_id)
+);
+CREATE TABLE IF NOT EXISTS assignments (
+    course_id TEXT,
+    id TEXT,
+    name TEXT,
+    due_at TEXT,
+    unlock_at TEXT,
+    lock_at TEXT,
+    published INTEGER,
+    muted INTEGER,
+    PRIMARY KEY (course_id, id)
+);
+CREATE TABLE IF NOT EXISTS overrides (
+    course_id TEXT,
+    assignment_id TEXT,
+    id INTEGER,
+    section_id INTEGER,
+    title TEXT,
+    due_at TEXT,
+    PRIMARY KEY (course_id, id)
+);
+CREATE INDEX IF NOT EXISTS sections_name ON sections (name);
+CREATE INDEX IF NOT EXISTS assignments_due ON assignments (due_at);
+CREATE INDEX IF NOT EXISTS overrides_assignment ON overrides (course_id, assignment_id, section_id);
+CREATE INDEX IF NOT EXISTS overrides_due ON overrides (due_at);
+"""
+
+#columns of the TSV compared by diff and the assignment columns they are compared to
+diff_fields = [('name', 'name'), ('unlock', 'unlock_at'), ('lock', 'lock_at'), ('published', 'published'), ('muted', 'muted')]
+
+class CourseStore:
+    def __init__(self, path):
+        """
+        Opens or creates a store in a SQLite database file
+        
+        The connection can be used by the threads of an upload, one at a time.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(schema)
+    
+    def __repr__(self):
+        return "Course Store: " + self.path
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        self.connection.close()
+    
+    #the Canvas ID of an assignment from the text it is stored as
+    def assignmentId(text):
+        return int(text) if text.isdigit() else text
+    
+    def saveCourse(self, courseID, sections, assignments, hostname=''):
+        """
+        Replaces the snapshot of a course
+        
+        params:
+            courseID: the Canvas course ID
+            sections: the SectionDirectory of the course, its picked sections are saved too
+            assignments: the Assignment objects of the course
+            hostname: the Canvas host the course is on
+        """
+        courseID = str(courseID)
+        with self.lock, self.connection:
+            for table in ['sections', 'picked_sections', 'assignments', 'overrides']:
+                self.connection.execute('DELETE FROM ' + table + ' WHERE course_id = ?', (courseID,))
+            self.connection.execute('INSERT OR REPLACE INTO courses VALUES (?, ?, ?)', (courseID, hostname, time.time()))
+            self.connection.executemany('INSERT INTO sections VALUES (?, ?, ?)',
+                                        [(courseID, section['id'], section['name']) for section in sections])
+            self.connection.executemany('INSERT OR IGNORE INTO picked_sections VALUES (?, ?)',
+                                        [(courseID, section['id']) for section in sections.labs()])
+            self.connection.executemany('INSERT INTO assignments VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                        [(courseID, str(a.id), a.name, a.due, a.unlock, a.lock, int(a.published), int(a.muted)) for a in assignments])
+            self.connection.executemany('INSERT INTO overrides VALUES (?, ?, ?, ?, ?, ?)',
+                                        [(courseID, str(a.id), o['id'], o.get('course_section_id'), o.get('title'), o.get('due_at'))
+                                         for a in assignments for o in a.overrides or []])
+    
+    #true if there is a snapshot of the course, with a SectionSelector only if it picks the sections the snapshot was saved with
+    def hasCourse(self, courseID, selector=None):
+        with self.lock:
+            if self.connection.execute('SELECT 1 FROM courses WHERE id = ?', (str(courseID),)).fetchone() is None:
+                return False
+            if selector is None:
+                return True
+            picked = self.connection.execute('SELECT section_id FROM picked_sections WHERE course_id = ?', (str(courseID),)).fetchall()
+        return set(ID for ID, in picked) == set(section['id'] for section in self.loadSections(courseID, selector).labs())
+    
+    #the SectionDirectory of the snapshot of a course, with the sections picked by a SectionSelector
+    def loadSections(self, courseID, selector=None):
+        with self.lock:
+            rows = self.connection.execute('SELECT id, name FROM sections WHERE course_id = ? ORDER BY rowid', (str(courseID),)).fetchall()
+        return SectionDirectory([{'id': ID, 'name': name} for ID, name in rows], selector)
+    
+    def loadAssignments(self, courseID, canvas, sections=None, ids=None):
+        """
+        Creates the Assignment objects of the snapshot of a course
+        
+        params:
+            courseID: the Canvas course ID
+            canvas: the Canvas object the assignments are changed with
+            sections: the SectionDirectory, loaded from the snapshot if not given
+            ids: the Canvas IDs of the assignments to load, all of them if None
+        """
+        courseID = str(courseID)
+        if sections is None:
+            sections = self.loadSections(courseID)
+        
+        query = 'SELECT id, name, due_at, unlock_at, lock_at, published, muted FROM assignments WHERE course_id = ?'
+        overrideQuery = 'SELECT assignment_id, id, section_id, title, due_at FROM overrides WHERE course_id = ?'
+        with self.lock:
+            if ids is None:
+                rows = self.connection.execute(query, (courseID,)).fetchall()
+                overrideRows = self.connection.execute(overrideQuery, (courseID,)).fetchall()
+            else:
+                self.connection.execute('CREATE TEMP TABLE IF NOT EXISTS wanted (id TEXT PRIMARY KEY)')
+                self.connection.execute('DELETE FROM wanted')
+                self.connection.executemany('INSERT OR IGNORE INTO wanted VALUES (?)', [(str(ID),) for ID in ids])
+                rows = self.connection.execute(query + ' AND id IN (SELECT id FROM wanted)', (courseID,)).fetchall()
+                overrideRows = self.connection.execute(overrideQuery + ' AND assignment_id IN (SELECT id FROM wanted)', (courseID,)).fetchall()
+        
+        overrides = {}
+        for assignmentID, ID, section, title, due in overrideRows:
+            overrides.setdefault(assignmentID, []).append({'id': ID, 'course_section_id': section, 'title': title, 'due_at': due})
+        
+        assignments = []
+        for ID, name, due, unlock, lock, published, muted in rows:
+            assignments.append(Assignment(name, due, CourseStore.assignmentId(ID), overrides.get(ID, []), muted, published, unlock, lock, canvas, sections))
+        return assignments
+    
+    #the first day of a week of a term and the first day of the next, week 1 starts on first_day, a 'YYYY-MM-DD' date
+    def weekRange(first_day, week):
+        start = datetime.date.fromisoformat(first_day) + datetime.timedelta(weeks=week - 1)
+        return start.isoformat(), (start + datetime.timedelta(days=7)).isoformat()
+    
+    def dueBetween(self, start, end, courseIDs=None):
+        """
+        Finds the due dates from start up to end across the courses in the store
+        
+        Returns (course ID, assignment ID, assignment name, section name, due date)
+        for the due dates of the assignments and of their overrides, sorted by date.
+        The section name is None for the due date of the assignment itself.
+        
+        params:
+            start: the first date, as 'YYYY-MM-DD' or in the UTC format of the REST API
+            end: the date after the last date in the same format
+            courseIDs: the courses to look in, all of them if None
+        """
+        query = ('SELECT course_id, id, name, NULL, due_at FROM assignments WHERE due_at >= ? AND due_at < ? {courses} '
+                 'UNION ALL '
+                 'SELECT o.course_id, o.assignment_id, a.name, s.name, o.due_at FROM overrides o '
+                 'JOIN assignments a ON a.course_id = o.course_id AND a.id = o.assignment_id '
+                 'LEFT JOIN sections s ON s.course_id = o.course_id AND s.id = o.section_id '
+                 'WHERE o.due_at >= ? AND o.due_at < ? {overrideCourses} '
+                 'ORDER BY 5, 1, 2')
+        params = [start, end]
+        courses = ''
+        overrideCourses = ''
+        if courseIDs is not None:
+            courseIDs = [str(ID) for ID in courseIDs]
+            marks = ', '.join('?' * len(courseIDs))
+            courses = 'AND course_id IN (' + marks + ')'
+            overrideCourses = 'AND o.course_id IN (' + marks + ')'
+            params = [start, end] + courseIDs + [start, end] + courseIDs
+        else:
+            params = [start, end, start, end]
+        
+        with self.lock:
+            rows = self.connection.execute(query.format(courses=courses, overrideCourses=overrideCourses), params).fetchall()
+        return [(courseID, CourseStore.assignmentId(ID), name, section, due) for courseID, ID, name, section, due in rows]
+    
+    def diff(self, courseID, rows, sectionIds):
+        """
+        Compares the rows of a TSV to the snapshot of a course with set operations
+        
+        Returns a dictionary of Canvas ID to the set of changed columns, which are
+        name, unlock, lock, published, muted, and sections. Rows that are not in the
+        snapshot have the change 'new' and assignments missing from the TSV 'removed'.
+        
+        params:
+            courseID: the Canvas course ID
+            rows: (ID, name, unlock, lock, published, muted, {section ID: due date}) for each
+                  row, with the dates in the UTC format of the REST API and '' for no date
+            sectionIds: the IDs of the sections that have a column in the TSV
+        """
+        courseID = str(courseID)
+        changes = {}
+        
+        def changed(ID, change):
+            changes.setdefault(CourseStore.assignmentId(ID), set()).add(change)
+        
+        with self.lock:
+            connection = self.connection
+            connection.execute('CREATE TEMP TABLE IF NOT EXISTS tsv (id TEXT PRIMARY KEY, name TEXT, unlock_at TEXT, lock_at TEXT, published INTEGER, muted INTEGER)')
+            connection.execute('CREATE TEMP TABLE IF NOT EXISTS tsv_dates (id TEXT, section_id INTEGER, due_at TEXT)')
+            connection.execute('CREATE TEMP TABLE IF NOT EXISTS tsv_sections (section_id INTEGER PRIMARY KEY)')
+            for table in ['tsv', 'tsv_dates', 'tsv_sections']:
+                connection.execute('DELETE FROM ' + table)
+            
+            dates = []
+            records = []
+            for ID, name, unlock, lock, published, muted, sectionDates in rows:
+                records.append((str(ID), name, unlock or '', lock or '', int(published), int(muted)))
+                dates += [(str(ID), section, due or '') for section, due in sectionDates.items()]
+            connection.executemany('INSERT OR REPLACE INTO tsv VALUES (?, ?, ?, ?, ?, ?)', records)
+            connection.executemany('INSERT INTO tsv_dates VALUES (?, ?, ?)', dates)
+            connection.executemany('INSERT OR IGNORE INTO tsv_sections VALUES (?)', [(section,) for section in sectionIds])
+            
+            #the snapshot as the TSV shows it, a section without an override shows the due date of the assignment
+            snapshot = ('SELECT id, name, COALESCE(unlock_at, \'\') AS unlock_at, COALESCE(lock_at, \'\') AS lock_at, published, muted '
+                        'FROM assignments WHERE course_id = ?')
+            snapshotDates = ('SELECT a.id, s.section_id, COALESCE(CASE WHEN o.id IS NULL THEN a.due_at ELSE o.due_at END, \'\') '
+                             'FROM assignments a CROSS JOIN tsv_sections s '
+                             'LEFT JOIN overrides o ON o.course_id = a.course_id AND o.assignment_id = a.id AND o.section_id = s.section_id '
+                             'WHERE a.course_id = ?')
+            
+            for ID, in connection.execute('SELECT id FROM tsv EXCEPT SELECT id FROM assignments WHERE course_id = ?', (courseID,)):
+                changed(ID, 'new')
+            for ID, in connection.execute('SELECT id FROM assignments WHERE course_id = ? EXCEPT SELECT id FROM tsv', (courseID,)):
+                changed(ID, 'removed')
+            
+            for field, column in diff_fields:
+                query = ('SELECT id, ' + column + ' FROM tsv EXCEPT SELECT id, ' + column + ' FROM (' + snapshot + ')')
+                for ID, value in connection.execute(query, (courseID,)):
+                    changed(ID, field)
+            
+            query = 'SELECT id, section_id, due_at FROM tsv_dates EXCEPT ' + snapshotDates
+            for ID, section, due in connection.execute(query, (courseID,)):
+                changed(ID, 'sections')
+        
+        #rows that are new only count as new
+        for ID in changes:
+            if 'new' in changes[ID]:
+                changes[ID] = {'new'}
+        return changes
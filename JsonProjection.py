@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming projection of Canvas list responses
+
+A listing is a json array of objects. The bytes of the array are read as they
+arrive and each object is cut down to the wanted fields as soon as it is complete,
+so only the text of one object is held at a time. The string and number values
+of the other fields, like the description html of an assignment, are skipped by
+one regular expression without being turned into Python objects, the arrays and
+objects of the other fields, like rubrics, are decoded one at a time and dropped.
+
+The wanted fields are a dictionary of field name to None to keep the whole value,
+or to the wanted fields of the objects in it, ie. {'id': None, 'overrides': {'id': None}}.
+"""
+
+import re
+import json
+import codecs
+
+string = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+space = r'[ \t\n\r]*'
+
+string_pattern = re.compile(string, re.DOTALL)
+string_rest_pattern = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+structure_pattern = re.compile(r'[^{}"]*')
+scalar_pattern = re.compile(r'[^,}\]\s]*')
+space_pattern = re.compile(space)
+key_pattern = re.compile(space + '(' + string + ')' + space + ':' + space, re.DOTALL)
+end_pattern = re.compile(space + '([,}])' + space)
+
+decoder = json.JSONDecoder()
+
+#the fields a list of names asks for, fields that are already a dictionary are kept
+def makeFields(fields):
+    if fields is None or isinstance(fields, dict):
+        return fields
+    return dict((field, None) for field in fields)
+
+#a pattern that matches a run of fields that are not wanted and have a string or number value
+#keys with escapes are left to projectObject to decode
+def skipPattern(fields):
+    wanted = '|'.join(re.escape(field) for field in fields)
+    member = '"(?!(?:' + wanted + ')")[^"\\\\]*"' + space + ':' + space + '(?:' + string + '|[^,}\\]\\s"\\[{]+)' + space + ',' + space
+    return re.compile('(?:' + member + ')*', re.DOTALL)
+
+#the position of the next character that is not whitespace
+def skipSpace(text, pos):
+    return space_pattern.match(text, pos).end()
+
+#the position after the json value that starts at pos, arrays and objects are decoded to find their end
+def skipValue(text, pos):
+    char = text[pos]
+    if char == '"':
+        return string_pattern.match(text, pos).end()
+    if char in '[{':
+        return decoder.raw_decode(text, pos)[1]
+    return scalar_pattern.match(text, pos).end()
+
+#keeps the wanted fields of the objects in a decoded value
+def pick(value, fields):
+    if fields is None:
+        return value
+    if isinstance(value, list):
+        return [pick(item, fields) for item in value]
+    if isinstance(value, dict):
+        return {key: value[key] if wanted is None else pick(value[key], wanted) for key, wanted in fields.items() if key in value}
+    return value
+
+def projectObject(text, pos, fields, skip):
+    """
+    Reads the json object at pos, keeping only the wanted fields
+    
+    Returns the dictionary and the position after the object. Raises IndexError,
+    AttributeError or ValueError if the object is not complete in text.
+    
+    params:
+        text: the json text
+        pos: the position the object starts at
+        fields: the wanted fields, a dictionary made by makeFields
+        skip: the skipPattern of the fields
+    """
+    record = {}
+    pos = skipSpace(text, pos + 1)
+    if text[pos] == '}':
+        return record, pos + 1
+    while True:
+        pos = skip.match(text, pos).end()
+        match = key_pattern.match(text, pos)
+        key = match.group(1)[1:-1]
+        if '\\' in key:
+            key = json.loads(match.group(1))
+        pos = match.end()
+        
+        if key in fields:
+            value, pos = decoder.raw_decode(text, pos)
+            record[key] = pick(value, fields[key])
+        else:
+            pos = skipValue(text, pos)
+        
+        match = end_pattern.match(text, pos)
+        pos = match.end()
+        if match.group(1) == '}':
+            return record, pos
+
+class ListProjection:
+    def __init__(self, fields):
+        """
+        Projects the objects of a json array that is fed to it in pieces
+        
+        Only the text of the object being read is held, the objects before it
+        are handed out as dictionaries of the wanted fields by feed. The end of an
+        object cut off by the end of a piece is found by following its strings and
+        braces through the next pieces, each piece is looked at once, and the
+        object is projected when it is complete.
+        
+        params:
+            fields: the wanted fields of each object, a dictionary or a list of names
+        """
+        self.fields = makeFields(fields)
+        self.skip = skipPattern(self.fields)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.opened = False
+        self.closed = False
+        
+        #the pieces of the object that is not complete yet, None between objects
+        self.pieces = None
+        #where the scan of that object is, see scan
+        self.depth = 0
+        self.inString = False
+        self.escaped = False
+    
+    def __repr__(self):
+        return "List Projection: " + ', '.join(self.fields)
+    
+    def scan(self, text, pos):
+        """
+        Follows the object being read through text from pos
+        
+        Returns the position after the brace that closes the object, or None if
+        the object goes on after text. The object starts with depth 0.
+        """
+        while pos < len(text):
+            if self.escaped:
+                self.escaped = False
+                pos += 1
+            elif self.inString:
+                pos = string_rest_pattern.match(text, pos).end()
+                if pos == len(text):
+                    break
+                if text[pos] == '\\':
+                    self.escaped = True #the escaped character is in the next piece
+                else:
+                    self.inString = False
+                pos += 1
+            else:
+                pos = structure_pattern.match(text, pos).end()
+                if pos == len(text):
+                    break
+                char = text[pos]
+                pos += 1
+                if char == '"':
+                    self.inString = True
+                elif char == '{':
+                    self.depth += 1
+                else:
+                    self.depth -= 1
+                    if self.depth == 0:
+                        return pos
+        return None
+    
+    def feed(self, data, final=False):
+        """
+        Adds the next bytes of the array and returns the objects completed by them
+        """
+        buffer = self.decoder.decode(data, final)
+        records = []
+        pos = 0
+        
+        #the end of an object that was cut off by the pieces before
+        if self.pieces is not None:
+            end = self.scan(buffer, 0)
+            if end is None:
+                if final:
+                    raise ValueError('Incomplete json object')
+                self.pieces.append(buffer)
+                return records
+            self.pieces.append(buffer[:end])
+            text = ''.join(self.pieces)
+            self.pieces = None
+            try:
+                records.append(projectObject(text, 0, self.fields, self.skip)[0])
+            except (IndexError, AttributeError, ValueError):
+                raise ValueError('Invalid json object')
+            pos = end
+        
+        while True:
+            pos = skipSpace(buffer, pos)
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if self.closed:
+                raise ValueError('Data after the json array')
+            if not self.opened:
+                if char != '[':
+                    raise ValueError('Expected a json array')
+                self.opened = True
+                pos += 1
+            elif char == ']':
+                self.closed = True
+                pos += 1
+            elif char == ',':
+                pos += 1
+            elif char != '{':
+                raise ValueError('Expected a json object at ' + str(pos))
+            else:
+                try:
+                    record, pos = projectObject(buffer, pos, self.fields, self.skip)
+                except (IndexError, AttributeError, ValueError):
+                    self.depth, self.inString, self.escaped = 0, False, False
+                    if self.scan(buffer, pos) is not None:
+                        raise ValueError('Invalid json object at ' + str(pos))
+                    if final:
+                        raise ValueError('Incomplete json object')
+                    #only the text of the object that is not complete yet is kept
+                    self.pieces = [buffer[pos:]]
+                    break
+                records.append(record)
+        return records
+    
+    #checks that the whole array was read
+    def close(self):
+        self.feed(b'', True)
+        if not self.closed:
+            raise ValueError('Incomplete json array')
+
+#projects the objects of a json array read in pieces from chunks, ie. response.iter_content()
+def projectList(chunks, fields):
+    projection = ListProjection(fields)
+    for chunk in chunks:
+        yield from projection.feed(chunk)
+    projection.close()
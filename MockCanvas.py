@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the Canvas endpoints used by CanvasAPI.Canvas, for benchmarks
+
+Serves a synthetic course with sections, assignments, quizzes, and overrides:
+    GET     /api/v1/courses/:course/sections
+    GET     /api/v1/courses/:course/quizzes
+    GET     /api/v1/courses/:course/quizzes/assignment_overrides
+    PUT     /api/v1/courses/:course/quizzes/:id
+    GET     /api/v1/courses/:course/assignments            (include[]=overrides)
+    GET/PUT /api/v1/courses/:course/assignments/:id
+    PUT     /api/v1/courses/:course/assignments/bulk_update
+    POST/PUT /api/v1/courses/:course/assignments/overrides
+    GET     /api/v1/progress/:id
+    POST    /api/graphql                                   (the query of CanvasAPI.graphql_query)
+    GET/POST /api/v1/courses/:course/assignments/:id/overrides
+    GET/PUT/DELETE /api/v1/courses/:course/assignments/:id/overrides/:override
+Listings are paginated with Link headers, every response carries an ETag and the
+X-Rate-Limit-Remaining and X-Request-Cost headers, and each request can be delayed.
+
+Also serves GET /_mock/stats with the request counts and POST /_mock/reset to clear them.
+
+Usage: python MockCanvas.py [--port 0] [--assignments 100] [--sections 5] [--latency 0]
+The first line printed is the port the server listens on.
+"""
+
+import re
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+class MockCourse:
+    def __init__(self, assignments=100, sections=5, override_every=3, quizzes=0):
+        """
+        Synthetic course with lab sections, assignments, and quizzes
+        
+        Every override_every-th assignment has an override for each lab section.
+        Every second quiz is graded and also an assignment, the others are practice
+        quizzes with an override for the first lab section.
+        """
+        self.lock = threading.Lock()
+        self.sections = [{'id': 1000 + x, 'name': 'Lab %d' % (301 + x), 'course_id': 1} for x in range(sections)]
+        self.sections.append({'id': 999, 'name': 'Lecture', 'course_id': 1})
+        
+        self.assignments = {}
+        self.overrides = {}
+        self.next_override = 1
+        for x in range(assignments):
+            ID = x + 1
+            due = '2026-%02d-%02dT23:59:00Z' % (1 + x // 28 % 12, 1 + x % 28)
+            self.assignments[ID] = {'id': ID, 'name': 'Assignment ' + str(ID), 'due_at': due,
+                                    'unlock_at': None, 'lock_at': None, 'published': True,
+                                    'muted': False, 'is_quiz_assignment': False,
+                                    'updated_at': '2026-01-01T00:00:00Z',
+                                    'description': '<p>' + 'Lorem ipsum dolor sit amet. ' * 40 + '</p>'}
+            self.overrides[ID] = []
+            if override_every and x % override_every == 0:
+                for section in self.sections[:-1]:
+                    self.addOverride(ID, {'course_section_id': section['id'], 'due_at': due})
+        
+        self.jobs = {}
+        self.quizzes = {}
+        self.quizOverrides = {}
+        for x in range(quizzes):
+            quizID = x + 1
+            due = '2026-%02d-%02dT12:00:00Z' % (1 + x // 28 % 12, 1 + x % 28)
+            quiz = {'id': quizID, 'title': 'Quiz ' + str(quizID), 'due_at': due, 'unlock_at': None,
+                    'lock_at': None, 'published': True, 'assignment_id': None,
+                    'quiz_type': 'practice_quiz' if x % 2 else 'assignment'}
+            self.quizOverrides[quizID] = []
+            if x % 2 == 0:
+                ID = assignments + quizID
+                quiz['assignment_id'] = ID
+                self.assignments[ID] = {'id': ID, 'name': quiz['title'], 'due_at': due, 'unlock_at': None,
+                                        'lock_at': None, 'published': True, 'muted': False,
+                                        'is_quiz_assignment': True, 'quiz_id': quizID,
+                                        'updated_at': '2026-01-01T00:00:00Z'}
+                self.overrides[ID] = []
+            elif self.sections[:-1]:
+                self.quizOverrides[quizID].append({'id': 100000 + quizID, 'title': self.sections[0]['name'],
+                                                   'due_at': due, 'unlock_at': None, 'lock_at': None})
+            self.quizzes[quizID] = quiz    
+    def bulkUpdate(self, entries):
+        """
+        Applies the dates of a bulk_update request and returns the Progress object of the job
+        
+        The job is reported as queued on the first poll and finished on the next one.
+        Unknown assignments and overrides fail the job with an error for the assignment.
+        """
+        errors = {}
+        for entry in entries:
+            ID = entry.get('id')
+            if ID not in self.assignments:
+                errors[str(ID)] = [{'message': 'assignment not found'}]
+                continue
+            for date in entry.get('all_dates', []):
+                values = dict((key, date[key]) for key in ['due_at', 'unlock_at', 'lock_at'] if key in date)
+                if date.get('base'):
+                    self.assignments[ID].update(values)
+                    continue
+                found = [o for o in self.overrides[ID] if o['id'] == date.get('id')]
+                if not found:
+                    errors[str(ID)] = [{'message': 'override ' + str(date.get('id')) + ' not found'}]
+                else:
+                    found[0].update(values)
+        
+        jobID = len(self.jobs) + 1
+        job = {'id': jobID, 'workflow_state': 'queued', 'completion': 0, 'tag': 'assignment_bulk_update', 'polls': 0,
+               'final': 'failed' if errors else 'completed', 'results': {'errors': errors} if errors else None}
+        self.jobs[jobID] = job
+        return self.progress(jobID, poll=False)
+    
+    def batchOverrides(self, method, values):
+        """
+        Creates (POST) or edits (PUT) the overrides of a batch override request
+        
+        Returns the overrides and the errors, nothing is changed if there are errors.
+        """
+        errors = []
+        sections = set(section['id'] for section in self.sections)
+        for x, value in enumerate(values):
+            ID = value.get('assignment_id')
+            if ID not in self.assignments:
+                errors.append({'index': x, 'message': 'assignment not found'})
+            elif method == 'POST' and value.get('course_section_id') not in sections:
+                errors.append({'index': x, 'message': 'section not found'})
+            elif method == 'PUT' and not [o for o in self.overrides[ID] if o['id'] == value.get('id')]:
+                errors.append({'index': x, 'message': 'override not found'})
+        if errors:
+            return None, errors
+        
+        overrides = []
+        for value in values:
+            ID = value['assignment_id']
+            if method == 'POST':
+                overrides.append(self.addOverride(ID, dict((k, v) for k, v in value.items() if k != 'assignment_id')))
+            else:
+                override = [o for o in self.overrides[ID] if o['id'] == value['id']][0]
+                override.update(dict((k, v) for k, v in value.items() if k not in ['id', 'assignment_id']))
+                overrides.append(override)
+        return overrides, None
+    
+    def graphql(self, variables):
+        """
+        Answers the course assignments query of CanvasAPI.graphql_query
+        
+        Only the variables are read, the response always has the shape of that query.
+        """
+        start = int(variables.get('after') or 0)
+        size = variables.get('pageSize') or 20
+        ids = list(self.assignments)
+        
+        def date(value):
+            return value.replace('Z', '+00:00') if value else None
+        
+        nodes = []
+        for ID in ids[start:start + size]:
+            assignment = self.assignments[ID]
+            overrides = [{'_id': str(o['id']), 'title': o['title'], 'dueAt': date(o.get('due_at')),
+                          'unlockAt': date(o.get('unlock_at')), 'lockAt': date(o.get('lock_at')),
+                          'set': {'__typename': 'Section', '_id': str(o['course_section_id'])}} for o in self.overrides[ID]]
+            nodes.append({'_id': str(ID), 'name': assignment['name'], 'dueAt': date(assignment['due_at']),
+                          'unlockAt': date(assignment['unlock_at']), 'lockAt': date(assignment['lock_at']),
+                          'published': assignment['published'], 'muted': assignment['muted'],
+                          'submissionTypes': ['online_quiz'] if assignment.get('is_quiz_assignment') else ['online_upload'],
+                          'assignmentOverrides': {'nodes': overrides, 'pageInfo': {'hasNextPage': False}}})
+        
+        course = {'assignmentsConnection': {'nodes': nodes, 'pageInfo': {'hasNextPage': start + size < len(ids), 'endCursor': str(start + size)}}}
+        if variables.get('withSections'):
+            course['sectionsConnection'] = {'nodes': [{'_id': str(section['id']), 'name': section['name']} for section in self.sections],
+                                            'pageInfo': {'hasNextPage': False}}
+        return {'course': course}
+    
+    #the Progress object of a bulk_update job
+    def progress(self, jobID, poll=True):
+        job = self.jobs[jobID]
+        if poll:
+            job['polls'] += 1
+            if job['polls'] > 1:
+                job['workflow_state'] = job['final']
+                job['completion'] = 100
+        values = dict((key, job[key]) for key in ['id', 'workflow_state', 'completion', 'tag'])
+        if job['workflow_state'] == 'failed':
+            values['results'] = job['results']
+            values['message'] = 'some assignments could not be updated'
+        return values
+    
+    #adds an override to an assignment, the lock must be held or not needed
+    def addOverride(self, ID, values):
+        section = [s for s in self.sections if s['id'] == values.get('course_section_id')]
+        override = {'id': self.next_override, 'assignment_id': ID,
+                    'title': section[0]['name'] if section else 'Override',
+                    'due_at': None, 'unlock_at': None, 'lock_at': None}
+        override.update(values)
+        self.next_override += 1
+        self.overrides[ID].append(override)
+        return override
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self, address, course, latency=0.0, per_page=100, rate_limit=700.0, refill=10.0):
+        """
+        HTTP server for a MockCourse
+        
+        params:
+            latency: seconds each request is delayed
+            per_page: most items on one page of a listing
+            rate_limit: size of the rate limit bucket, requests are refused with 403 when it is empty
+            refill: amount the bucket refills each second
+        """
+        super().__init__(address, MockHandler)
+        self.course = course
+        self.latency = latency
+        self.per_page = per_page
+        self.rate_limit = rate_limit
+        self.refill = refill
+        self.bucket = rate_limit
+        self.bucket_time = time.time()
+        self.counts = {}
+        self.bytes_sent = 0
+    
+    #takes the cost of a request from the rate limit bucket, returns the remaining amount
+    def spend(self, cost):
+        with self.course.lock:
+            now = time.time()
+            self.bucket = min(self.rate_limit, self.bucket + (now - self.bucket_time) * self.refill)
+            self.bucket_time = now
+            self.bucket -= cost
+            return self.bucket
+    
+    #counts a request by method and endpoint
+    def count(self, method, endpoint, size):
+        with self.course.lock:
+            key = method + ' ' + endpoint
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.bytes_sent += size
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    #headers and body go out in one write so the client never waits on a delayed ack
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def readBody(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length)) or {}
+        except ValueError:
+            return {}
+    
+    def send(self, data, status=200, link=None, endpoint=''):
+        body = json.dumps(data).encode('utf-8')
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        cost = 1.0 + len(body) / 100000.0
+        remaining = self.server.spend(cost)
+        
+        if remaining < 0:
+            status = 403
+            body = b'{"errors": "403 Forbidden (Rate Limit Exceeded)"}'
+        elif self.command == 'GET' and status == 200 and self.headers.get('If-None-Match') == etag:
+            status = 304
+            body = b''
+        
+        self.server.count(self.command, endpoint + ('' if status < 300 else ' ' + str(status)), len(body))
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('X-Rate-Limit-Remaining', '%.1f' % max(remaining, 0))
+        self.send_header('X-Request-Cost', '%.4f' % cost)
+        if link:
+            self.send_header('Link', link)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    #sends one page of a listing with the Link header for the next one
+    def sendPage(self, items, endpoint):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        page = int(query.get('page', ['1'])[0])
+        per_page = min(int(query.get('per_page', ['10'])[0]), self.server.per_page)
+        
+        link = None
+        if page * per_page < len(items):
+            query['page'] = [str(page + 1)]
+            link = '<http://' + self.headers['Host'] + parts.path + '?' + urlencode(query, doseq=True) + '>; rel="next"'
+        self.send(items[(page - 1) * per_page:page * per_page], link=link, endpoint=endpoint)
+    
+    def handle_request(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        
+        course = self.server.course
+        parts = urlsplit(self.path)
+        method = self.command
+        body = self.readBody() if method in ['POST', 'PUT', 'DELETE'] else {}
+        
+        if parts.path == '/_mock/stats':
+            with course.lock:
+                stats = {'counts': dict(self.server.counts), 'bytes': self.server.bytes_sent}
+            return self.send(stats, endpoint='stats')
+        if parts.path == '/_mock/reset':
+            with course.lock:
+                self.server.counts = {}
+                self.server.bytes_sent = 0
+                self.server.bucket = self.server.rate_limit
+            return self.send({}, endpoint='reset')
+        
+        if parts.path == '/api/graphql' and method == 'POST':
+            with course.lock:
+                data = course.graphql(body.get('variables') or {})
+            return self.send({'data': data}, endpoint='/api/graphql')
+        
+        match = re.match(r'/api/v1/progress/(\d+)$', parts.path)
+        if match and int(match.group(1)) in course.jobs:
+            with course.lock:
+                job = course.progress(int(match.group(1)))
+            return self.send(job, endpoint='/progress/:id')
+        
+        match = re.match(r'/api/v1/courses/[^/]+/(.*)$', parts.path)
+        if not match:
+            return self.send({'errors': 'not found'}, 404, endpoint='unknown')
+        path = match.group(1).strip('/')
+        query = parse_qs(parts.query)
+        
+        if path == 'sections' and method == 'GET':
+            return self.sendPage(course.sections, '/sections')
+        if path == 'quizzes' and method == 'GET':
+            with course.lock:
+                items = [dict(quiz) for quiz in course.quizzes.values()]
+            return self.sendPage(items, '/quizzes')
+        if path == 'quizzes/assignment_overrides' and method == 'GET':
+            with course.lock:
+                items = [{'quiz_id': quizID,
+                          'due_dates': [dict(quiz, base=True)] + [dict(o) for o in course.quizOverrides[quizID]],
+                          'all_dates': []} for quizID, quiz in course.quizzes.items()]
+            return self.send({'quiz_assignment_overrides': items}, endpoint='/quizzes/assignment_overrides')
+        if path == 'assignments/overrides' and method in ['POST', 'PUT']:
+            with course.lock:
+                overrides, errors = course.batchOverrides(method, body.get('assignment_overrides', []))
+            if errors:
+                return self.send({'errors': errors}, 400, endpoint='/assignments/overrides')
+            return self.send(overrides, endpoint='/assignments/overrides')
+        if path == 'assignments/bulk_update' and method == 'PUT':
+            with course.lock:
+                job = course.bulkUpdate(body if isinstance(body, list) else [])
+            return self.send(job, endpoint='/assignments/bulk_update')
+        match = re.match(r'quizzes/(\d+)$', path)
+        if match and int(match.group(1)) in course.quizzes:
+            quizID = int(match.group(1))
+            if method == 'PUT':
+                with course.lock:
+                    course.quizzes[quizID].update(body.get('quiz', {}))
+            return self.send(course.quizzes[quizID], endpoint='/quizzes/:id')
+        if path == 'assignments' and method == 'GET':
+            with course.lock:
+                items = []
+                wanted = set(int(ID) for ID in query.get('assignment_ids[]', []))
+                for assignment in course.assignments.values():
+                    if wanted and assignment['id'] not in wanted:
+                        continue
+                    assignment = dict(assignment)
+                    if 'overrides' in query.get('include[]', []):
+                        assignment['overrides'] = [dict(o) for o in course.overrides[assignment['id']]]
+                    items.append(assignment)
+            return self.sendPage(items, '/assignments')
+        
+        match = re.match(r'assignments/(\d+)(/overrides)?(?:/(\d+))?$', path)
+        if not match or int(match.group(1)) not in course.assignments:
+            return self.send({'errors': 'not found'}, 404, endpoint='unknown')
+        ID = int(match.group(1))
+        
+        if not match.group(2):
+            endpoint = '/assignments/:id'
+            if method == 'PUT':
+                with course.lock:
+                    course.assignments[ID].update(body.get('assignment', {}))
+                    course.assignments[ID]['updated_at'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+            return self.send(course.assignments[ID], endpoint=endpoint)
+        
+        if not match.group(3):
+            endpoint = '/assignments/:id/overrides'
+            if method == 'POST':
+                with course.lock:
+                    override = course.addOverride(ID, body.get('assignment_override', {}))
+                return self.send(override, 201, endpoint=endpoint)
+            return self.sendPage(course.overrides[ID], endpoint)
+        
+        endpoint = '/assignments/:id/overrides/:id'
+        overrideID = int(match.group(3))
+        with course.lock:
+            found = [o for o in course.overrides[ID] if o['id'] == overrideID]
+            if not found:
+                override = None
+            else:
+                override = found[0]
+                if method == 'DELETE':
+                    course.overrides[ID].remove(override)
+                elif method == 'PUT':
+                    override.update(body.get('assignment_override', {}))
+        if override is None:
+            return self.send({'errors': 'not found'}, 404, endpoint=endpoint)
+        return self.send(override, endpoint=endpoint)
+    
+    do_GET = handle_request
+    do_POST = handle_request
+    do_PUT = handle_request
+    do_DELETE = handle_request
+
+#starts a server for a course on a background thread and returns it
+def startServer(course, port=0, **options):
+    server = MockServer(('127.0.0.1', port), course, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve a synthetic Canvas course for benchmarks.')
+    parser.add_argument('--port', type=int, default=0, help='port to listen on, 0 picks a free one')
+    parser.add_argument('--assignments', type=int, default=100, help='number of assignments')
+    parser.add_argument('--sections', type=int, default=5, help='number of lab sections')
+    parser.add_argument('--quizzes', type=int, default=0, help='number of quizzes, every second one is graded')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds each request is delayed')
+    parser.add_argument('--per-page', type=int, default=100, help='most items on a page of a listing')
+    parser.add_argument('--rate-limit', type=float, default=700.0, help='size of the rate limit bucket')
+    args = parser.parse_args()
+    
+    course = MockCourse(args.assignments, args.sections, quizzes=args.quizzes)
+    server = MockServer(('127.0.0.1', args.port), course, args.latency, args.per_page, args.rate_limit)
+    print(server.server_address[1], flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-endpoint metrics of the requests sent by the Canvas object
+
+Requests are grouped by method and endpoint template, ie. GET /assignments/:id/overrides,
+and each group records the call count, a latency histogram, the bytes sent and
+received, the status codes, and the X-Rate-Limit-Remaining and X-Request-Cost headers.
+The metrics can be read as a dictionary, as json, or as Prometheus text.
+"""
+
+import re
+import json
+import time
+import threading
+from urllib.parse import urlsplit
+
+#upper bounds in seconds of the latency histogram buckets
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+#ids in a path, replaced by :id in the endpoint template
+id_pattern = re.compile(r'/(?:\d+|sis_[a-z_]+:[^/]+)(?=/|$)')
+
+class EndpointMetrics:
+    def __init__(self):
+        """
+        Metrics of the requests to one endpoint
+        """
+        self.count = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(latency_buckets) + 1)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.statuses = {}
+        self.rate_limit_remaining = None
+        self.request_cost = 0.0
+    
+    def snapshot(self):
+        return {'count': self.count,
+                'seconds': self.seconds,
+                'latency_buckets': dict(zip([str(b) for b in latency_buckets] + ['+Inf'], self.buckets)),
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+                'statuses': dict(self.statuses),
+                'rate_limit_remaining': self.rate_limit_remaining,
+                'request_cost': self.request_cost}
+
+class RequestMetrics:
+    def __init__(self):
+        """
+        Collects the metrics of the requests of one or more Canvas objects
+        
+        Pass it to Canvas as metrics to turn the recording on, a Canvas without
+        metrics records nothing.
+        """
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.started = time.time()
+        self.rate_limit_remaining = None
+    
+    def __repr__(self):
+        return "Request Metrics: " + str(sum(e.count for e in self.endpoints.values())) + " requests"
+    
+    #the endpoint template of a url, with the api prefix, course, query, and ids removed
+    def template(self, url):
+        template = urlsplit(url).path.split('/api/v1', 1)[-1]
+        template = re.sub(r'^/courses/[^/]+', '', template)
+        return id_pattern.sub('/:id', template) or '/'
+    
+    def record(self, method, url, response, seconds, sent=0, received=None):
+        """
+        Records one request
+        
+        params:
+            method: the http method
+            url: the url the request was sent to
+            response: the requests response, None if no response was received
+            seconds: the time taken by the request, with reading the body
+            sent: the size of the request body
+            received: the size of the body read from a streamed response, the
+                      size of the content of the response if not given. Both
+                      are the bytes after decompression.
+        """
+        key = method + ' ' + self.template(url)
+        status = 'error'
+        remaining = None
+        cost = 0.0
+        if response is not None:
+            status = str(response.status_code)
+            if received is None:
+                received = len(response.content or b'')
+            remaining = response.headers.get('X-Rate-Limit-Remaining')
+            try:
+                cost = float(response.headers.get('X-Request-Cost') or 0)
+                remaining = float(remaining) if remaining is not None else None
+            except ValueError:
+                remaining = None
+        
+        bucket = 0
+        while bucket < len(latency_buckets) and seconds > latency_buckets[bucket]:
+            bucket += 1
+        
+        with self.lock:
+            endpoint = self.endpoints.get(key)
+            if endpoint is None:
+                endpoint = self.endpoints[key] = EndpointMetrics()
+            endpoint.count += 1
+            endpoint.seconds += seconds
+            endpoint.buckets[bucket] += 1
+            endpoint.bytes_sent += sent
+            endpoint.bytes_received += received or 0
+            endpoint.statuses[status] = endpoint.statuses.get(status, 0) + 1
+            endpoint.request_cost += cost
+            if remaining is not None:
+                endpoint.rate_limit_remaining = remaining
+                self.rate_limit_remaining = remaining
+    
+    #forgets everything recorded so far
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.started = time.time()
+            self.rate_limit_remaining = None
+    
+    #the metrics as a dictionary of plain values
+    def snapshot(self):
+        with self.lock:
+            endpoints = {key: self.endpoints[key].snapshot() for key in sorted(self.endpoints)}
+            return {'started': self.started,
+                    'requests': sum(e['count'] for e in endpoints.values()),
+                    'rate_limit_remaining': self.rate_limit_remaining,
+                    'endpoints': endpoints}
+    
+    #the metrics as json
+    def dumps(self, indent=4):
+        return json.dumps(self.snapshot(), indent=indent)
+    
+    #the metrics in the Prometheus text exposition format
+    def prometheus(self):
+        snapshot = self.snapshot()
+        lines = []
+        
+        def metric(name, kind, description):
+            lines.append('# HELP ' + name + ' ' + description)
+            lines.append('# TYPE ' + name + ' ' + kind)
+        
+        def labels(key, **extra):
+            method, endpoint = key.split(' ', 1)
+            values = [('method', method), ('endpoint', endpoint)] + list(extra.items())
+            return '{' + ','.join(name + '="' + value.replace('\\', '\\\\').replace('"', '\\"') + '"' for name, value in values) + '}'
+        
+        endpoints = snapshot['endpoints']
+        metric('canvas_requests_total', 'counter', 'Requests sent to Canvas.')
+        for key, values in endpoints.items():
+            for status, count in sorted(values['statuses'].items()):
+                lines.append('canvas_requests_total' + labels(key, status=status) + ' ' + str(count))
+        
+        metric('canvas_request_duration_seconds', 'histogram', 'Time taken by requests to Canvas.')
+        for key, values in endpoints.items():
+            total = 0
+            for bound, count in values['latency_buckets'].items():
+                total += count
+                lines.append('canvas_request_duration_seconds_bucket' + labels(key, le=bound) + ' ' + str(total))
+            lines.append('canvas_request_duration_seconds_sum' + labels(key) + ' ' + repr(values['seconds']))
+            lines.append('canvas_request_duration_seconds_count' + labels(key) + ' ' + str(values['count']))
+        
+        metric('canvas_request_bytes_total', 'counter', 'Bytes of request bodies sent to Canvas.')
+        for key, values in endpoints.items():
+            lines.append('canvas_request_bytes_total' + labels(key) + ' ' + str(values['bytes_sent']))
+        
+        metric('canvas_response_bytes_total', 'counter', 'Bytes of response bodies received from Canvas.')
+        for key, values in endpoints.items():
+            lines.append('canvas_response_bytes_total' + labels(key) + ' ' + str(values['bytes_received']))
+        
+        metric('canvas_request_cost_total', 'counter', 'Sum of the X-Request-Cost headers.')
+        for key, values in endpoints.items():
+            lines.append('canvas_request_cost_total' + labels(key) + ' ' + repr(values['request_cost']))
+        
+        metric('canvas_rate_limit_remaining', 'gauge', 'Last X-Rate-Limit-Remaining header.')
+        for key, values in endpoints.items():
+            if values['rate_limit_remaining'] is not None:
+                lines.append('canvas_rate_limit_remaining' + labels(key) + ' ' + repr(values['rate_limit_remaining']))
+        
+        return '\n'.join(lines) + '\n'
+    
+    #saves the metrics to a file, as Prometheus text for .prom and .txt files and as json otherwise
+    def save(self, filename):
+        text = self.prometheus() if filename.endswith(('.prom', '.txt')) else self.dumps()
+        with open(filename, 'w') as file:
+            file.write(text)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of Canvas GET responses used by the Canvas object
+
+Entries are revalidated with If-None-Match/If-Modified-Since on every use,
+so an unchanged resource costs a 304 response instead of the full body.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlsplit
+
+class ResponseCache:
+    def __init__(self, directory, max_bytes=50*1024*1024, ttl=7*24*60*60):
+        """
+        Creates a response cache stored in a directory
+        
+        params:
+            directory: folder the entries are saved to, created if missing
+            max_bytes: total size of the entries before the least recently used are evicted
+            ttl: seconds an entry is kept after it was last used
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        
+        os.makedirs(directory, exist_ok=True)
+        self.index_file = os.path.join(directory, 'index.json')
+        
+        #the index maps each key to the url, size and last use of its entry
+        self.index = {}
+        try:
+            with open(self.index_file, 'r') as file:
+                self.index = json.load(file)
+        except (FileNotFoundError, ValueError):
+            pass
+        
+        with self.lock:
+            self.evict()
+    
+    def __repr__(self):
+        return "Response Cache: " + str(len(self.index)) + " entries in " + self.directory
+    
+    #key of an entry, made from the url and payload of the request
+    def key(url, payload=None):
+        text = url + '\n' + json.dumps(payload, sort_keys=True)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+    
+    #the file an entry is saved in
+    def path(self, key):
+        return os.path.join(self.directory, key + '.json')
+    
+    #gets the saved entry for a request, None if there is none
+    def lookup(self, url, payload=None):
+        key = ResponseCache.key(url, payload)
+        with self.lock:
+            if key not in self.index:
+                return None
+            try:
+                with open(self.path(key), 'r') as file:
+                    return json.load(file)
+            except (FileNotFoundError, ValueError):
+                self.remove(key)
+                return None
+    
+    #headers that ask the server to only send the resource if it changed
+    def validators(entry):
+        headers = {}
+        if entry is None:
+            return headers
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    #marks an entry as used after the server confirmed it is unchanged
+    def touch(self, url, payload=None):
+        key = ResponseCache.key(url, payload)
+        with self.lock:
+            if key in self.index:
+                self.index[key]['used'] = time.time()
+    
+    #saves a response, only responses the server can revalidate are kept
+    def store(self, url, payload, response, data, nextUrl=None):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        
+        key = ResponseCache.key(url, payload)
+        entry = {'url': url, 'etag': etag, 'last_modified': last_modified,
+                 'data': data, 'next': nextUrl}
+        text = json.dumps(entry)
+        
+        with self.lock:
+            with open(self.path(key), 'w') as file:
+                file.write(text)
+            self.index[key] = {'url': url, 'size': len(text), 'used': time.time()}
+            self.evict()
+            self.save()
+    
+    #removes the entries affected by a POST, PUT or DELETE to url
+    def invalidate(self, url):
+        #entries of the same collection of the course are affected, for example a new
+        #override of assignment 5 changes courses/1/assignments, courses/1/assignments/5, ...
+        parts = urlsplit(url).path.split('/api/v1/')[-1].strip('/').split('/')
+        prefixes = ['/'.join(parts[:3])]
+        
+        #quizzes are also assignments, so a change to one affects both
+        if len(parts) >= 3 and parts[2] in ['assignments', 'quizzes']:
+            prefixes = [parts[0] + '/' + parts[1] + '/assignments', parts[0] + '/' + parts[1] + '/quizzes']
+        
+        with self.lock:
+            for key in list(self.index):
+                path = urlsplit(self.index[key]['url']).path.split('/api/v1/')[-1].strip('/')
+                for prefix in prefixes:
+                    if path == prefix or path.startswith(prefix + '/'):
+                        self.remove(key)
+                        break
+            self.save()
+    
+    #removes all entries
+    def clear(self):
+        with self.lock:
+            for key in list(self.index):
+                self.remove(key)
+            self.save()
+    
+    #removes an entry and its file, the lock must be held
+    def remove(self, key):
+        self.index.pop(key, None)
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+    
+    #drops expired entries, then the least recently used until under max_bytes, the lock must be held
+    def evict(self):
+        now = time.time()
+        for key in list(self.index):
+            if now - self.index[key]['used'] > self.ttl:
+                self.remove(key)
+        
+        total = sum(entry['size'] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]['used']):
+            if total <= self.max_bytes:
+                break
+            total -= self.index[key]['size']
+            self.remove(key)
+    
+    #writes the index to disk, the lock must be held
+    def save(self):
+        with open(self.index_file, 'w') as file:
+            json.dump(self.index, file)
+    
+    #writes the last use of the entries to disk
+    def close(self):
+        with self.lock:
+            self.save()
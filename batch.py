@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Runs downloads and uploads for many courses at once, spread across worker processes
+
+The manifest is a json file:
+{
+    "hostname" : "https://canvas.wisc.edu/",
+    "token" : "1234~...",
+    "action" : "upload",
+    "courses" : [
+        {"courseID" : "12345", "filename" : "lab1.tsv"},
+        {"courseID" : "12346", "filename" : "lab2.tsv", "action" : "download"}
+    ]
+}
+action is "download" or "upload" and can be set for each course.
+
+Usage: python batch.py manifest.json [--processes 4] [--workers 1]
+"""
+
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from CanvasAPI import Canvas
+import editor
+
+#session shared by the courses run in a worker process
+session = None
+
+#sets up the session of a worker process
+def startWorker(pool_size):
+    global session
+    session = Canvas.makeSession(pool_size)
+
+def runCourse(hostname, token, course, workers=1):
+    """
+    Downloads or uploads one course of the manifest in a worker process
+    
+    Returns a summary of the course with its time, request count, and error if it failed.
+    """
+    result = {'courseID': str(course['courseID']), 'filename': course['filename'],
+              'action': course['action'], 'ok': True, 'error': '', 'requests': 0, 'seconds': 0.0}
+    start = time.time()
+    
+    canvas = Canvas(hostname, str(course['courseID']), token, session=session)
+    try:
+        if course['action'] == 'download':
+            editor.downloadCourse(canvas, course['filename'])
+        elif course['action'] == 'upload':
+            editor.uploadCourse(canvas, course['filename'], workers)
+        else:
+            raise ValueError('Unknown action: ' + str(course['action']))
+    except Exception as error:
+        result['ok'] = False
+        result['error'] = repr(error)
+    finally:
+        canvas.close()
+    
+    result['requests'] = canvas.requestCount
+    result['seconds'] = time.time() - start
+    return result
+
+#reads a manifest file and gives each course its action
+def loadManifest(filename):
+    with open(filename, 'r') as file:
+        manifest = json.load(file)
+    for course in manifest['courses']:
+        course.setdefault('action', manifest.get('action', 'upload'))
+    return manifest
+
+def runBatch(manifest, processes=4, workers=1):
+    """
+    Runs every course of a manifest on a pool of worker processes
+    
+    Progress is printed as each course finishes. Returns the summary of each course
+    in the order of the manifest.
+    
+    params:
+        manifest: dictionary read from a manifest file by loadManifest
+        processes: number of worker processes
+        workers: number of threads each upload uses, see editor.upload
+    """
+    courses = manifest['courses']
+    results = [None] * len(courses)
+    
+    with ProcessPoolExecutor(max_workers=processes, initializer=startWorker, initargs=(max(10, workers),)) as pool:
+        futures = {}
+        for idx, course in enumerate(courses):
+            futures[pool.submit(runCourse, manifest['hostname'], manifest['token'], course, workers)] = idx
+        
+        for done, future in enumerate(as_completed(futures), 1):
+            idx = futures[future]
+            try:
+                results[idx] = future.result()
+            except Exception as error: #the worker process itself failed
+                course = courses[idx]
+                results[idx] = {'courseID': str(course['courseID']), 'filename': course['filename'],
+                                'action': course['action'], 'ok': False, 'error': repr(error),
+                                'requests': 0, 'seconds': 0.0}
+            result = results[idx]
+            status = 'done' if result['ok'] else 'FAILED ' + result['error']
+            print('[' + str(done) + '/' + str(len(courses)) + '] Course', result['courseID'], result['action'], status)
+    
+    return results
+
+#prints the summary of a batch
+def printSummary(results, seconds):
+    print()
+    print('Course\tAction\tStatus\tSeconds\tRequests\tFile')
+    for result in results:
+        status = 'ok' if result['ok'] else 'failed'
+        print(result['courseID'] + '\t' + result['action'] + '\t' + status + '\t' + 
+              '%.2f' % result['seconds'] + '\t' + str(result['requests']) + '\t' + result['filename'])
+    
+    failed = [result for result in results if not result['ok']]
+    print()
+    print(len(results), 'courses,', len(failed), 'failed,', sum(result['requests'] for result in results), 
+          'requests in', '%.2f' % seconds, 'seconds')
+    for result in failed:
+        print('--> Course', result['courseID'], result['error'])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Download or upload the assignments of many Canvas courses.')
+    parser.add_argument('manifest', help='json manifest of the courses')
+    parser.add_argument('--processes', type=int, default=4, help='number of worker processes')
+    parser.add_argument('--workers', type=int, default=1, help='threads used by each upload')
+    args = parser.parse_args()
+    
+    start = time.time()
+    results = runBatch(loadManifest(args.manifest), args.processes, args.workers)
+    printSummary(results, time.time() - start)
+    sys.exit(0 if all(result['ok'] for result in results) else 1)
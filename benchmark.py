@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks download() and upload() against the local mock Canvas server in MockCanvas.py
+
+For every course size the mock server is started in its own process with a synthetic
+course, the course is downloaded to a TSV, about half of the rows are changed, and
+the TSV is uploaded again. Wall time, requests sent, and the peak memory of the
+client are reported for both.
+
+Usage: python benchmark.py [--assignments 10 100 1000] [--sections 5 50] [--latency 0.02]
+                           [--workers 1] [--per-page 100] [--json results.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+
+import requests
+
+import editor
+
+#the directory of this file, MockCanvas.py is started from it
+here = os.path.dirname(os.path.abspath(__file__))
+
+#starts a mock Canvas server process and returns the process and its url
+def startMock(assignments, sections, latency, per_page, rate_limit):
+    process = subprocess.Popen([sys.executable, os.path.join(here, 'MockCanvas.py'),
+                                '--assignments', str(assignments), '--sections', str(sections),
+                                '--latency', str(latency), '--per-page', str(per_page),
+                                '--rate-limit', str(rate_limit)],
+                               stdout=subprocess.PIPE, text=True)
+    port = int(process.stdout.readline())
+    return process, 'http://127.0.0.1:' + str(port) + '/'
+
+#gets the request counts of the mock server and resets them
+def mockStats(url):
+    stats = requests.get(url + '_mock/stats').json()
+    requests.post(url + '_mock/reset')
+    return stats
+
+def changeTSV(filename):
+    """
+    Changes about half of the rows of a downloaded TSV so the upload has work to do
+    
+    Every second assignment is renamed and every fourth one gets the first lab
+    section date of the next row.
+    """
+    with open(filename) as tsvfile:
+        rows = [line.rstrip('\n').split('\t') for line in tsvfile if line.strip()]
+    
+    for x in range(1, len(rows)):
+        if x % 2 == 0:
+            rows[x][0] += ' (changed)'
+        if x % 4 == 0 and x + 1 < len(rows) and len(rows[x]) > 6:
+            rows[x][1] = rows[x + 1][1]
+    
+    with open(filename, 'w') as tsvfile:
+        for row in rows:
+            tsvfile.write('\t'.join(row) + '\n')
+
+#runs a function and returns the wall time and peak traced memory
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        function(*args)
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+def runCase(assignments, sections, latency=0.0, workers=1, per_page=100, rate_limit=100000.0):
+    """
+    Downloads and uploads one synthetic course
+    
+    Returns a dictionary with the results for the download and the upload.
+    """
+    process, url = startMock(assignments, sections, latency, per_page, rate_limit)
+    result = {'assignments': assignments, 'sections': sections, 'latency': latency, 'workers': workers}
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'course.tsv')
+            
+            #keep the output of the editor out of the report
+            with open(os.devnull, 'w') as devnull:
+                stdout = sys.stdout
+                sys.stdout = devnull
+                try:
+                    download = measure(editor.download, url, '1', 'benchmark', filename)
+                    downloadStats = mockStats(url)
+                    changeTSV(filename)
+                    upload = measure(editor.upload, url, '1', 'benchmark', filename, workers)
+                    uploadStats = mockStats(url)
+                finally:
+                    sys.stdout = stdout
+        
+        for name, (elapsed, peak), stats in [('download', download, downloadStats), ('upload', upload, uploadStats)]:
+            result[name] = {'seconds': elapsed, 'requests': sum(stats['counts'].values()),
+                            'bytes': stats['bytes'], 'peak_memory': peak, 'endpoints': stats['counts']}
+    finally:
+        process.terminate()
+        process.wait()
+    return result
+
+#prints a table of the results
+def printResults(results):
+    print('%-12s %-9s %-9s %10s %9s %12s' % ('assignments', 'sections', 'phase', 'seconds', 'requests', 'peak MB'))
+    for result in results:
+        for phase in ['download', 'upload']:
+            values = result[phase]
+            print('%-12d %-9d %-9s %10.3f %9d %12.2f' % (result['assignments'], result['sections'], phase,
+                                                       values['seconds'], values['requests'],
+                                                       values['peak_memory'] / 2 ** 20))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark download and upload against a mock Canvas server.')
+    parser.add_argument('--assignments', type=int, nargs='+', default=[10, 100, 1000], help='course sizes to run')
+    parser.add_argument('--sections', type=int, nargs='+', default=[5, 50], help='lab section counts to run')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the server delays each request')
+    parser.add_argument('--workers', type=int, default=1, help='threads used by upload')
+    parser.add_argument('--per-page', type=int, default=100, help='most items the server puts on a page')
+    parser.add_argument('--rate-limit', type=float, default=100000.0, help='size of the server rate limit bucket')
+    parser.add_argument('--json', help='file to write the full results to')
+    args = parser.parse_args()
+    
+    results = []
+    for assignments in args.assignments:
+        for sections in args.sections:
+            results.append(runCase(assignments, sections, args.latency, args.workers, args.per_page, args.rate_limit))
+    
+    printResults(results)
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=4)
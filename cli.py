@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Command line interface to download and upload Canvas assignments without the GUI
+
+Usage:
+    python cli.py download FILE [--incremental] [--quizzes] [--cache-dir DIR]
+    python cli.py upload FILE [--workers N] [--bulk] [--no-batch] [--cache-dir DIR]
+    python cli.py plan FILE
+    python cli.py watch FILE [--debounce S] [--no-batch] [--cache-dir DIR]
+    python cli.py diff FILE
+    python cli.py due (--from DATE --to DATE | --week N --term-start DATE) [--course-ids ID ...]
+    python cli.py startup [--runs N]
+
+The hostname, course ID, and token are taken from --hostname, --course, and --token,
+and from defaults.json for any that are not given. tkinter is never imported.
+With --metrics FILE, the requests of each endpoint are counted and timed and saved to FILE.
+With --store FILE, the courses are kept in the SQLite store in FILE, which diff and due read.
+--sections REGEX or --section-ids ID,ID pick the sections with a column, the lab sections by default.
+"""
+
+import time
+started = time.perf_counter()
+
+import os
+import sys
+import argparse
+import subprocess
+
+#seconds that importing the command line interface and editor may take
+startup_budget = 0.5
+
+#fills in the Canvas info missing from the arguments with defaults.json
+def canvasInfo(args):
+    info = {'hostname': args.hostname, 'courseID': args.course, 'token': args.token}
+    if not all(info.values()):
+        from editor import loadDefaults
+        defaults = loadDefaults(args.defaults)
+        for key in info:
+            if not info[key]:
+                info[key] = str(defaults[key]).strip()
+    
+    missing = [key for key in info if not info[key]]
+    if missing:
+        sys.exit('Missing Canvas info: ' + ', '.join(missing))
+    return info
+
+#the SectionSelector of --sections or --section-ids, None for the default
+def sectionSelector(args):
+    if args.sections is None and args.section_ids is None:
+        return None
+    from CanvasAPI import SectionSelector
+    ids = None
+    if args.section_ids is not None:
+        ids = [int(ID) for ID in args.section_ids.split(',')]
+    return SectionSelector(args.sections, ids)
+
+def download(args):
+    import editor
+    info = canvasInfo(args)
+    if args.incremental:
+        #the snapshot next to the TSV only follows the REST listing of the assignments
+        unsupported = [option for option, used in [('--quizzes', args.quizzes), ('--backend graphql', args.backend != 'rest'), ('--store', args.store)] if used]
+        if unsupported:
+            sys.exit('--incremental can not be used with ' + ', '.join(unsupported) + ', download without --incremental instead')
+        editor.downloadIncremental(info['hostname'], info['courseID'], info['token'], args.file, args.cache_dir, metrics=args.metrics, selector=sectionSelector(args))
+    else:
+        editor.download(info['hostname'], info['courseID'], info['token'], args.file, args.cache_dir, metrics=args.metrics, quizzes=args.quizzes, backend=args.backend, store_path=args.store, selector=sectionSelector(args))
+
+def upload(args):
+    import editor
+    info = canvasInfo(args)
+    result = editor.upload(info['hostname'], info['courseID'], info['token'], args.file, args.workers, args.cache_dir, metrics=args.metrics, bulk=args.bulk, batch=not args.no_batch, backend=args.backend, store_path=args.store, selector=sectionSelector(args))
+    if args.bulk and result[2]:
+        sys.exit(str(len(result[2])) + ' rows not updated: ' + ', '.join(str(row) for row in sorted(result[2])))
+
+#pushes the edits of the TSV every time it is saved until Ctrl+C is pressed
+def watch(args):
+    import editor
+    info = canvasInfo(args)
+    editor.watch(info['hostname'], info['courseID'], info['token'], args.file, args.cache_dir, metrics=args.metrics, batch=not args.no_batch, backend=args.backend, selector=sectionSelector(args), debounce=args.debounce)
+
+#prints what an upload would change without changing anything
+def plan(args):
+    import editor
+    info = canvasInfo(args)
+    with editor.Canvas(info['hostname'], info['courseID'], info['token'], cache=editor.openCache(args.cache_dir), metrics=args.metrics, backend=args.backend, section_selector=sectionSelector(args)) as canvas:
+        store = editor.openStore(args.store)
+        try:
+            changes = editor.planUpload(canvas, args.file, store=store)
+        finally:
+            if store is not None:
+                store.close()
+        
+        for oldAssignment, comp, operations in changes:
+            fields = [key for key in comp if not comp[key]]
+            print('Assignment:', oldAssignment.name, '(' + str(oldAssignment.id) + ') changes', ', '.join(fields))
+            for action, section, overrideID, payload in operations:
+                date = ''
+                if payload is not None:
+                    date = payload['assignment_override']['due_at']
+                print('\t' + action, 'override for section', oldAssignment.sectionName(section), date)
+        
+        requests = sum(len(operations) + 1 for oldAssignment, comp, operations in changes)
+        print(len(changes), 'assignments to update with', requests, 'requests')
+
+#opens the store of --store, which diff and due need
+def openStore(args):
+    if not args.store:
+        sys.exit(args.command + ' needs a course store, pass --store FILE')
+    from CourseStore import CourseStore
+    return CourseStore(args.store)
+
+#prints the rows of a TSV that changed since the snapshot of the course in the store
+def diff(args):
+    import editor
+    courseID = args.course or canvasInfo(args)['courseID']
+    with openStore(args) as store:
+        if not store.hasCourse(courseID):
+            sys.exit('No snapshot of course ' + str(courseID) + ' in ' + args.store)
+        if not store.hasCourse(courseID, sectionSelector(args)):
+            sys.exit('The snapshot of course ' + str(courseID) + ' was saved with other sections picked, download it again with these sections')
+        changes = editor.diffSnapshot(store, courseID, args.file, sectionSelector(args))
+    
+    for ID in sorted(changes, key=str):
+        print(ID, ', '.join(sorted(changes[ID])))
+    print(len(changes), 'rows changed')
+
+#prints the due dates in a date range across the courses in the store
+def due(args):
+    from CourseStore import CourseStore
+    if args.week is not None:
+        if not args.term_start:
+            sys.exit('--week needs --term-start')
+        start, end = CourseStore.weekRange(args.term_start, args.week)
+    elif args.start and args.end:
+        start, end = args.start, args.end
+    else:
+        sys.exit('Pass --from and --to, or --week and --term-start')
+    
+    with openStore(args) as store:
+        rows = store.dueBetween(start, end, args.course_ids)
+    
+    for courseID, ID, name, section, date in rows:
+        print(date, courseID, ID, name, section or 'Everyone', sep='\t')
+    print(len(rows), 'due dates from', start, 'to', end)
+
+def startup(args):
+    """
+    Measures the time to import the command line interface and editor in a new process
+    
+    Exits with an error if the median time is over startup_budget or tkinter was imported.
+    """
+    code = ('import time; t = time.perf_counter(); import cli, editor, sys; '
+            'print(time.perf_counter() - t, "tkinter" in sys.modules)')
+    here = os.path.dirname(os.path.abspath(__file__))
+    
+    times = []
+    tkinter = False
+    for run in range(args.runs):
+        output = subprocess.run([sys.executable, '-c', code], cwd=here, capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(output[0]))
+        tkinter = tkinter or output[1] == 'True'
+    
+    times.sort()
+    median = times[len(times) // 2]
+    print('startup: median %.3f s, min %.3f s, max %.3f s over %d runs (budget %.3f s)' % (median, times[0], times[-1], args.runs, startup_budget))
+    if tkinter:
+        sys.exit('startup: tkinter was imported')
+    if median > startup_budget:
+        sys.exit('startup: over budget')
+
+def makeParser():
+    parser = argparse.ArgumentParser(description='Download and upload the assignments of a Canvas course.')
+    parser.add_argument('--hostname', help='Canvas hostname, ie. https://canvas.wisc.edu/')
+    parser.add_argument('--course', help='Canvas course ID')
+    parser.add_argument('--token', help='Canvas access token')
+    parser.add_argument('--defaults', default='defaults.json', help='json file with the default hostname, courseID, and token')
+    parser.add_argument('--timing', action='store_true', help='print the time taken to start and to run the command')
+    parser.add_argument('--backend', choices=['rest', 'graphql'], default='rest', help='fetch the assignments with the REST listings or one GraphQL query, graphql falls back to rest')
+    parser.add_argument('--metrics', metavar='FILE', help='save per-endpoint request metrics to FILE, as Prometheus text for .prom files and json otherwise')
+    parser.add_argument('--store', metavar='FILE', help='SQLite file the course snapshots are kept in')
+    parser.add_argument('--sections', metavar='REGEX', help='regular expression of the names of the sections with a column, default lab')
+    parser.add_argument('--section-ids', metavar='ID,ID', help='comma separated IDs of the sections with a column, instead of --sections')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    command = commands.add_parser('download', help='download the assignments to a TSV file')
+    command.add_argument('file', help='TSV file to write')
+    command.add_argument('--incremental', action='store_true', help='only refetch the assignments that changed since the last download')
+    command.add_argument('--quizzes', action='store_true', help='also download the quizzes that are not assignments, like practice quizzes')
+    command.add_argument('--cache-dir', help='directory to cache responses in')
+    command.set_defaults(run=download)
+    
+    command = commands.add_parser('upload', help='upload a TSV file to Canvas')
+    command.add_argument('file', help='TSV file to upload')
+    command.add_argument('--workers', type=int, default=1, help='number of assignments updated in parallel')
+    command.add_argument('--bulk', action='store_true', help='update the dates with bulk_update jobs instead of a request per assignment')
+    command.add_argument('--no-batch', action='store_true', help='send a request per override instead of batches of overrides')
+    command.add_argument('--cache-dir', help='directory to cache responses in')
+    command.set_defaults(run=upload)
+    
+    command = commands.add_parser('plan', help='show what uploading a TSV file would change')
+    command.add_argument('file', help='TSV file to compare')
+    command.add_argument('--cache-dir', help='directory to cache responses in')
+    command.set_defaults(run=plan)
+    
+    command = commands.add_parser('watch', help='upload the changed rows of a TSV file every time it is saved')
+    command.add_argument('file', help='TSV file to watch')
+    command.add_argument('--debounce', type=float, default=0.5, help='seconds the file has to stay unchanged before it is uploaded')
+    command.add_argument('--no-batch', action='store_true', help='send a request per override instead of batches of overrides')
+    command.add_argument('--cache-dir', help='directory to cache responses in')
+    command.set_defaults(run=watch)
+    
+    command = commands.add_parser('diff', help='show the rows of a TSV file that changed since the snapshot in --store')
+    command.add_argument('file', help='TSV file to compare')
+    command.set_defaults(run=diff)
+    
+    command = commands.add_parser('due', help='list the due dates in a date range across the courses in --store')
+    command.add_argument('--from', dest='start', metavar='DATE', help='first date, YYYY-MM-DD')
+    command.add_argument('--to', dest='end', metavar='DATE', help='date after the last date, YYYY-MM-DD')
+    command.add_argument('--week', type=int, help='week of the term, week 1 starts on --term-start')
+    command.add_argument('--term-start', metavar='DATE', help='first day of the term, YYYY-MM-DD')
+    command.add_argument('--course-ids', nargs='+', metavar='ID', help='only the due dates of these courses')
+    command.set_defaults(run=due)
+    
+    command = commands.add_parser('startup', help='measure the startup time against the budget')
+    command.add_argument('--runs', type=int, default=5, help='number of times to measure')
+    command.set_defaults(run=startup)
+    
+    return parser
+
+def main(argv=None):
+    args = makeParser().parse_args(argv)
+    if args.timing:
+        print('started in %.3f s' % (time.perf_counter() - started))
+    
+    #the metrics file name is swapped for the RequestMetrics the requests are recorded in
+    metricsFile = args.metrics
+    if metricsFile:
+        from RequestMetrics import RequestMetrics
+        args.metrics = RequestMetrics()
+    
+    start = time.perf_counter()
+    try:
+        args.run(args)
+    finally:
+        if metricsFile:
+            args.metrics.save(metricsFile)
+    if args.timing:
+        print(args.command, 'took %.3f s' % (time.perf_counter() - start))
+
+if __name__ == '__main__':
+    main()
@@ -7,52 +7,101 @@ Created on Thu Jan 17 17:45:08 2019
 contact: clnguyen2@wisc.edu
 """
 
+import io
+import os
 import re
 import csv
 import random
 import datetime as dt
 from dateutil import tz
-from tkinter import Button, Label, Tk, Entry, LabelFrame, Frame
-from tkinter.filedialog import askopenfilename, asksaveasfilename
 import json
+import asyncio
+import functools
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 #Custom library for Canvas items and assignments
-from CanvasAPI import Canvas, Assignment
+from CanvasAPI import Canvas, Assignment, Cancelled, override_batch_limit
+from ResponseCache import ResponseCache
+from CourseStore import CourseStore
 
 #%% Get default hostname, courseID, and token here from json file
 
-hostname = '' #the base url of your canvas page ie. https://canvas.wisc.edu
-courseID = '' #course ID
-token = '' #token obtained from Canvas
-
-try:
-    #load the json file
-    json_file = open('defaults.json', 'r')
-    defaults = json.load(json_file)
-    json_file.close()
-    
-    #read in default values
-    if 'hostname' in defaults:
-        hostname = defaults['hostname']
-    if 'courseID' in defaults:
-        courseID = defaults['courseID']
-    if 'token' in defaults:
-        token = defaults['token']
-except FileNotFoundError:
-    pass
+def loadDefaults(filename='defaults.json'):
+    """
+    Reads the default hostname, courseID, and token from the json file
+    
+    The file is only read when this is called, missing values are empty strings.
+    """
+    defaults = {'hostname': '', #the base url of your canvas page ie. https://canvas.wisc.edu
+                'courseID': '', #course ID
+                'token': ''} #token obtained from Canvas
+    try:
+        #load the json file
+        with open(filename, 'r') as json_file:
+            values = json.load(json_file)
+        
+        #read in default values
+        for key in defaults:
+            if key in values:
+                defaults[key] = values[key]
+    except FileNotFoundError:
+        pass
+    return defaults
+
+#%%
+class Progress():
+    """
+    Progress of a download or upload, reported from a worker thread through a queue
+    
+    Messages put on the queue:
+        ('start', phase, total): a new phase of work, total is None if it is not known
+        ('step', count): count more of the phase is done
+        ('wrote', count): count more changes were written to Canvas
+    Cancelling stops the work at the next request or row by raising Cancelled.
+    """
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.cancelled = threading.Event()
+    
+    def start(self, phase, total=None):
+        self.queue.put(('start', phase, total))
+    
+    def step(self, count=1):
+        self.queue.put(('step', count))
+    
+    def wrote(self, count=1):
+        self.queue.put(('wrote', count))
+    
+    def cancel(self):
+        self.cancelled.set()
+    
+    #raises Cancelled if the work was cancelled
+    def check(self):
+        if self.cancelled.is_set():
+            raise Cancelled('Cancelled')
 
 #%%
 class App():
     """
     Tkinter app for downloading and uploading assignments to Canvas.
+    
+    tkinter is only imported when the app is made, so the rest of this module
+    can be used without it.
     """
-    def __init__(self, courseID ='', token =''):
+    def __init__(self, courseID ='', token ='', hostname =''):
+        from tkinter import Button, Label, Tk, Entry, LabelFrame, Frame
+        from tkinter.ttk import Progressbar
+        
         #Set up the GUI
         self.root=Tk()
         self.root.resizable(width=False, height=False)
         self.root.title("Canvas Assignment Editor")
-        self.root.geometry("650x350+30+30")
+        self.root.geometry("650x400+30+30")
         self.root.config(borderwidth=4)
         
         #The description on top
@@ -107,6 +156,20 @@ class App():
         self.label = Label(self.root, text = '', fg = 'red')
         self.label.grid(row=4,column=0)
         
+        #Progress of the running download or upload
+        self.progressFrame = Frame(self.root)
+        self.progressFrame.grid(row=5, column=0, sticky='EW')
+        self.progressBar = Progressbar(self.progressFrame, orient='horizontal', length=450, mode='determinate')
+        self.progressBar.grid(row=0, column=0, sticky='W')
+        self.cancelButton = Button(self.progressFrame, text = 'Cancel', command = self.cancel, state = 'disabled')
+        self.cancelButton.grid(row=0, column=1, sticky='E')
+        self.progressLabel = Label(self.progressFrame, text = '')
+        self.progressLabel.grid(row=1, column=0, columnspan=2, sticky='W')
+        
+        #the worker thread and its progress, None when nothing is running
+        self.worker = None
+        self.progress = None
+        
         #populates the host, token, and courseID if they are values
         try: self.host.insert(0, hostname.strip())
         except: pass
@@ -130,82 +193,170 @@ class App():
         
     #function to send TSV file to Canvas
     def sendFile(self):
-        if not self.validateInfo():
+        from tkinter.filedialog import askopenfilename
+        if not self.validateInfo() or self.worker is not None:
             return
-        self.root.update()
         self.label["text"] = 'Uploading... Please Wait'
         filename = askopenfilename(title = "Select file", filetypes = (("tab-separated values","*.tsv"),("all files","*.*")))
         if filename == None or filename =='': # asksaveasfile return `None` if dialog closed with "cancel".
             self.label["text"] = ''    
             return
         self.upload_file['text']=filename[filename.rfind('/')+1:]
-        self.root.update()
-        try: 
-            upload(self.host.get(), self.courseID.get(), self.token.get(), filename)
-            self.label['text'] = 'Upload complete. Check Canvas'
-            self.upload_file['text'] = ''
-        except: 
-            self.label["text"] = 'Error... Check console for messages'
-            self.upload_file['text'] = ''
-            raise
+        self.runInBackground(upload, (self.host.get(), self.courseID.get(), self.token.get(), filename),
+                             'Upload complete. Check Canvas', 'Error... Check console for messages')
         
     #function to load Canvas assignments and save to TSV
     def loadCanvas(self):
-            if not self.validateInfo():
+            from tkinter.filedialog import asksaveasfilename
+            if not self.validateInfo() or self.worker is not None:
                 return
-            self.root.update()
             self.label["text"] = 'Downloading... Please Wait'
             filename = asksaveasfilename(title = 'File to save Canvas data', defaultextension=".tsv", filetypes = (("tab-separated values","*.tsv"),("all files","*.*")))
             if filename == None or filename =='': # asksaveasfile return `None` if dialog closed with "cancel".
                 self.label["text"] = ''
                 return
             self.download_file['text'] = filename[filename.rfind('/')+1:]
-            self.root.update()
-            try: 
-                download(self.host.get(), self.courseID.get(),self.token.get(),filename)
-                self.label["text"] = 'Done. File saved to ' + self.download_file['text']
-                self.download_file['text'] = ''
-            except: 
-                self.label["text"] = 'Error... Check console'
-                self.download_file['text'] = ''
-                raise
-            
+            self.runInBackground(download, (self.host.get(), self.courseID.get(),self.token.get(),filename),
+                                 'Done. File saved to ' + self.download_file['text'], 'Error... Check console')
+    
+    #runs a download or upload on a worker thread so the window keeps responding
+    def runInBackground(self, function, args, doneText, errorText):
+        self.progress = Progress()
+        progress = self.progress
+        
+        def work():
+            try:
+                function(*args, progress=progress)
+                progress.queue.put(('done', doneText))
+            except Cancelled:
+                progress.queue.put(('done', 'Cancelled'))
+            except Exception:
+                traceback.print_exc()
+                progress.queue.put(('done', errorText))
+        
+        self.phase = ''
+        self.total = None
+        self.done = 0
+        self.written = 0
+        self.phaseStart = time.time()
+        self.cancelButton['state'] = 'normal'
+        self.worker = threading.Thread(target=work, daemon=True)
+        self.worker.start()
+        self.root.after(100, self.poll)
+    
+    #reads the messages of the worker thread and updates the progress bar
+    def poll(self):
+        finished = None
+        try:
+            while True:
+                message = self.progress.queue.get_nowait()
+                if message[0] == 'start':
+                    self.phase, self.total = message[1], message[2]
+                    self.done = 0
+                    self.phaseStart = time.time()
+                    if self.total:
+                        self.progressBar.stop()
+                        self.progressBar.config(mode='determinate', maximum=self.total, value=0)
+                    else:
+                        self.progressBar.config(mode='indeterminate')
+                        self.progressBar.start(20)
+                elif message[0] == 'step':
+                    self.done += message[1]
+                    if self.total:
+                        self.progressBar['value'] = self.done
+                elif message[0] == 'wrote':
+                    self.written += message[1]
+                elif message[0] == 'done':
+                    finished = message[1]
+        except queue.Empty:
+            pass
+        
+        #show the counts and an estimate of the time left in the phase
+        text = self.phase + ': ' + str(self.done)
+        if self.total:
+            text = text + ' of ' + str(self.total)
+            if self.done:
+                left = (time.time() - self.phaseStart) / self.done * (self.total - self.done)
+                text = text + ', about ' + str(int(left) + 1) + ' s left'
+        if self.written:
+            text = text + ', ' + str(self.written) + ' changes written'
+        self.progressLabel['text'] = text
+        
+        if finished is None:
+            self.root.after(100, self.poll)
+            return
+        
+        #the worker is done
+        self.progressBar.stop()
+        self.progressBar.config(mode='determinate', value=0)
+        self.cancelButton['state'] = 'disabled'
+        self.label['text'] = finished
+        self.download_file['text'] = ''
+        self.upload_file['text'] = ''
+        self.worker = None
+    
+    #cancels the running download or upload before its next request
+    def cancel(self):
+        if self.progress is not None:
+            self.progress.cancel()
+            self.label['text'] = 'Cancelling...'
             
     #needed for clean exit of program
     def on_close(self):
+        self.cancel()
         self.root.destroy()
         exit(0)
     
     
 #%%
 
+#the local time formats of the spreadsheet, in the order they are tried
+local_formats = ['%m/%d/%Y %H:%M:%S', '%m/%d/%Y %H:%M', '%m/%d/%y %H:%M:%S', '%m/%d/%y %H:%M']
+
+#patterns of a time that is already iso or already local
+iso_pattern = re.compile('[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]T[0-9][0-9]:[0-9][0-9]:[0-9][0-9]Z')
+local_pattern = re.compile('[0-9][0-9]?/[0-9][0-9]?/[0-9][0-9]+ [0-9][0-9]?:[0-9][0-9]')
+
+#number of converted times remembered by local_to_iso and iso_to_local
+date_cache_size = 8192
+
+#finds the local format that a time is written in, None if it matches none of them
+def detect_local_format(date_time):
+    for date_format in local_formats:
+        try:
+            dt.datetime.strptime(date_time, date_format)
+            return date_format
+        except ValueError:
+            pass
+    return None
+
 #Converts local time to iso format to upload to canvas
-def local_to_iso(date_time):
+#hint is a format to try before the others, usually the format found for the column
+#results are remembered since the same times repeat all over a sheet
+@functools.lru_cache(maxsize=date_cache_size)
+def local_to_iso(date_time, hint=None):
     if date_time == '' or date_time == None or date_time == 'None':
         return ''
     
      #if the pattern already matches iso, return it
-    pattern = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]T[0-9][0-9]:[0-9][0-9]:[0-9][0-9]Z'
-    if re.match(pattern, date_time):
+    if iso_pattern.match(date_time):
         return date_time
     
     from_zone = tz.tzlocal() #convert from local timezone
     to_zone = tz.tzutc() #convert to utc timezone
     
     #Try a bunch of different variations of the timestamp
-    try: 
-        date_in = dt.datetime.strptime(date_time, '%m/%d/%Y %H:%M:%S')
-    except ValueError:
+    formats = local_formats
+    if hint is not None:
+        formats = [hint] + [f for f in local_formats if f != hint]
+    for date_format in formats:
         try:
-            date_in = dt.datetime.strptime(date_time, '%m/%d/%Y %H:%M')
+            date_in = dt.datetime.strptime(date_time, date_format)
+            break
         except ValueError:
-            try:
-                date_in = dt.datetime.strptime(date_time, '%m/%d/%y %H:%M:%S')
-            except ValueError:
-                try:
-                    date_in = dt.datetime.strptime(date_time, '%m/%d/%y %H:%M')
-                except ValueError:
-                    print(type(date_time), date_time)
+            pass
+    else:
+        print(type(date_time), date_time)
     
     date_in = date_in.replace(tzinfo=from_zone)
     date_out = date_in.astimezone(to_zone)
@@ -217,14 +368,14 @@ def local_to_iso(date_time):
     return date_out.strftime('%Y-%m-%dT%H:%M:%SZ') #returns time in ISO format
 
 #Converts iso time to standard format for the spreadsheet
+#results are remembered since the same times repeat all over a sheet
+@functools.lru_cache(maxsize=date_cache_size)
 def iso_to_local(date_time):
     if date_time == '' or date_time == None or date_time.lower() == 'None':
         return ''
     
     #if the pattern already matches local, return it
-    pattern = '[0-9][0-9]?/[0-9][0-9]?/[0-9][0-9]+ [0-9][0-9]?:[0-9][0-9]:[0-9][0-9]'
-    pattern2 = '[0-9][0-9]?/[0-9][0-9]?/[0-9][0-9]+ [0-9][0-9]?:[0-9][0-9]'
-    if re.match(pattern, date_time) or re.match(pattern2, date_time):
+    if local_pattern.match(date_time):
         return date_time
     
     from_zone = tz.tzutc() #convert from utc
@@ -236,212 +387,1397 @@ def iso_to_local(date_time):
     
     return date_out.strftime('%m/%d/%Y %H:%M:%S')
 
+class LocalColumn:
+    """
+    Converts the local times of one TSV column to iso format
+    
+    The format of the column is found from its first time and tried first for
+    the rest of the column.
+    """
+    def __init__(self):
+        self.format = None
+    
+    def __call__(self, date_time):
+        if self.format is None and date_time and date_time != 'None' and not iso_pattern.match(date_time):
+            self.format = detect_local_format(date_time)
+        return local_to_iso(date_time, self.format)
+
+#Converts a whole column of local times to iso format
+def local_column_to_iso(column):
+    convert = LocalColumn()
+    return [convert(date_time) for date_time in column]
+
+#Converts a whole column of iso times to local times
+def iso_column_to_local(column):
+    return [iso_to_local(date_time) for date_time in column]
+
 
+#the Canvas ID written for a quiz that has no assignment, quiz IDs can be the same as assignment IDs
+def quizRowId(quizID):
+    return 'quiz:' + str(quizID)
 
-def getCourseAssignments(canvas):
+#the quiz ID of a Canvas ID made by quizRowId, None for assignment IDs
+def quizId(ID):
+    if isinstance(ID, str) and ID.startswith('quiz:'):
+        return int(ID[5:])
+    return None
+
+def quizAssignments(assignments, quizzes, sections):
     """
-    Gets the assignments from Canvas
+    Makes assignment listing entries for the quizzes that are not in the assignment listing
+    
+    Graded quizzes are also assignments flagged is_quiz_assignment and are left to
+    their assignment. The rest, like practice quizzes, get an entry with the Canvas ID
+    from quizRowId. Their overrides from the bulk quiz override listing carry no
+    section ID, so the section is found by the override title.
     
     params:
-        canvas: a Canvas object
+        assignments: assignment listing fetched with include[]=overrides
+        quizzes: quiz listing from Canvas.getAllAssignments with quizzes
+        sections: the SectionDirectory of the course
     """
+    quizAssignmentIds = set(a['id'] for a in assignments if a.get('is_quiz_assignment'))
     
-    print('Getting assignments...', end='')
-    quizzes, assignments = canvas.getAllAssignments()
-    print(' Done')
-    print('Making assignment objects...', end='')
+    entries = []
+    for quiz in quizzes or []:
+        if quiz.get('assignment_id') in quizAssignmentIds:
+            continue
+        overrides = []
+        for override in quiz.get('overrides') or []:
+            section = sections.byName.get(override.get('title'))
+            if section is not None and section['id'] in sections.position:
+                overrides.append({'id': override['id'], 'due_at': override.get('due_at'), 'course_section_id': section['id'], 'title': override['title']})
+        entries.append({'id': quizRowId(quiz['id']), 'name': quiz['title'], 'due_at': quiz.get('due_at'),
+                        'unlock_at': quiz.get('unlock_at'), 'lock_at': quiz.get('lock_at'),
+                        'published': quiz.get('published', False), 'muted': False, 'overrides': overrides})
+    return entries
+
+#the properties kept from the canvas assignments and their overrides
+assignment_keep = ['id','title','due_at', 'all_dates', 'unlock_at', 'lock_at', 
+                   'show_correct_answers_at', 'hide_correct_answers_at', 'published', 
+                   'muted', 'name', 'is_quiz_assignment']
+override_keep = ['id', 'due_at', 'course_section_id', 'title']
+
+#the fields asked for when the assignment listing is projected as it streams in, see JsonProjection
+assignment_fields = dict((field, None) for field in assignment_keep)
+assignment_fields['overrides'] = dict((field, None) for field in override_keep)
+
+def makeAssignments(canvas, assignments, sections, quizzes=None):
+    """
+    Creates the assignment objects from the assignment listing of Canvas
     
-    #filter out the properties from the canvas assignments
-    keepList = ['id','title','due_at', 'all_dates', 'unlock_at', 'lock_at', 
-                'show_correct_answers_at', 'hide_correct_answers_at', 'published', 
-                'muted', 'name', 'is_quiz_assignment']
+    params:
+        canvas: a Canvas or AsyncCanvas object
+        assignments: assignment listing fetched with include[]=overrides
+        sections: the SectionDirectory of the course
+        quizzes: quiz listing with overrides, the quizzes without an assignment are added
+    """
+    if quizzes:
+        assignments = list(assignments) + quizAssignments(assignments, quizzes, sections)
     
-    assignments = Assignment.filterData(assignments, keepList)
+    #the overrides came back with the assignment listing, group them before filtering
+    #the filtering is only left to do for listings that were not projected as they streamed in
+    overrideDict = Canvas.groupOverrides(assignments)
+    assignments = Assignment.filterData(assignments, assignment_keep)
     
-    #add overrides to assignment 
+    #add overrides to assignment, only keeping the overrides of the selected sections
     for assignment in assignments:
-        overrides = canvas.getAssignmentOverrides(assignment['id'])
-        overrides = Assignment.filterData(overrides, ['id', 'due_at', 'course_section_id', 'title'])
-        remove_list = []
-        for override in overrides:
-            if 'lab' not in override['title'].lower():
-                remove_list.append(override)
-        for override in remove_list:
-            overrides.remove(override)
-        assignment['overrides'] = overrides
+        overrides = overrideDict.get(assignment['id'], [])
+        overrides = Assignment.filterData(overrides, override_keep)
+        assignment['overrides'] = [override for override in overrides if override.get('course_section_id') in sections.position]
     
     #create a list of assignment objects
     assignmentList=[]
     
-    #create an assignment object for each assignment
+    #create an assignment object for each assignment, all sharing the same section directory
     for a in assignments:
-        assignmentList.append(Assignment(a['name'], a['due_at'], a['id'], a['overrides'], a['muted'], a['published'], a['unlock_at'], a['lock_at'], canvas))
+        assignmentList.append(Assignment(a['name'], a['due_at'], a['id'], a['overrides'], a['muted'], a['published'], a['unlock_at'], a['lock_at'], canvas, sections))
     
+    return assignmentList
+
+def getCourseAssignments(canvas, quizzes=False):
+    """
+    Gets the assignments from Canvas
+    
+    params:
+        canvas: a Canvas object
+        quizzes: also get the quizzes that are not assignments, the quiz listing is not fetched otherwise
+    """
+    
+    print('Getting assignments...', end='')
+    if canvas.progress is not None:
+        canvas.progress.start('Getting assignments')
+    quizList, assignments = canvas.getAllAssignments(quizzes=quizzes, fields=assignment_fields)
+    print(' Done')
+    print('Making assignment objects...', end='')
+    assignmentList = makeAssignments(canvas, assignments, canvas.getSectionDirectory(), quizList)
     print(' Done')
     return assignmentList
 
-def download(hostname, courseID, token, filename):
+#sorts the assignments by the due date of a random section
+def sortAssignments(assignments):
+    random_section = random.choice(assignments[0].sectionIds())
+    assignments.sort(key=lambda assignment: assignment.get(random_section) or '', reverse=False)
+
+#gets the headers of the TSV and the assignment key for each header
+def tsvColumns(sections):
+    sectionNames = []
+    sectionKeys = []
+    for section in sections.labs():
+        sectionNames.append(section['name'])
+        sectionKeys.append(section['id'])
+    
+    #Create the headers
+    headers = sectionNames
+    headers.insert(0, "Title")
+    headers += ["Available from", "Available until", "Published", "Muted", "Canvas ID"]
+    
+    #create a key for each header
+    keys = sectionKeys
+    keys.insert(0, 'name')
+    keys +=['unlock_at', 'lock_at','published', 'muted','id']
+    
+    return headers, keys
+
+#converts an assignment value to the text of a cell
+def textCell(value):
+    if value is None or str(value).lower() == 'none':
+        return ''
+    return str(value)
+
+#converts an assignment date to the local time text of a cell
+def dateCell(value):
+    if value is None or value == '' or value == 'None':
+        return ''
+    return iso_to_local(value)
+
+#gets the (key, converter) for each column, sections and available from/until are dates
+def tsvConverters(keys):
+    converters = []
+    for key in keys:
+        if type(key) == int or key in ['due_at', 'unlock_at', 'lock_at']:
+            converters.append((key, dateCell))
+        else:
+            converters.append((key, textCell))
+    return converters
+
+#gets the cells of the TSV row of an assignment
+def tsvRow(assignment, converters):
+    row = []
+    for key, convert in converters:
+        row.append(convert(assignment.get(key)))
+    return row
+
+#csv writer for the TSV files
+def tsvWriter(file):
+    return csv.writer(file, delimiter='\t', lineterminator='\n')
+
+#Function that actually creates the TSV
+def create_Canvas_TSV(sections, assignmentList, filename, progress=None):
+    """
+    Writes the TSV of the assignments
+    
+    Rows are written as the assignments come, so assignmentList can be any
+    iterable of Assignment objects. With a progress, each row is a step.
+    """
+    print('Creating TSV...', end='')
+    
+    headers, keys = tsvColumns(sections)
+    converters = tsvConverters(keys)
+    
+    with open(filename, 'w', newline='') as file:
+        writer = tsvWriter(file)
+        writer.writerow(headers)
+        for assignment in assignmentList:
+            writer.writerow(tsvRow(assignment, converters))
+            if progress is not None:
+                progress.step()
+    print('Done')
+
+#opens the response cache in cache_dir, None if no directory is given
+def openCache(cache_dir):
+    if cache_dir:
+        return ResponseCache(cache_dir)
+    return None
+
+#opens the course store in store_path, None if no path is given
+def openStore(store_path):
+    if store_path:
+        return CourseStore(store_path)
+    return None
+
+def download(hostname, courseID, token, filename, cache_dir=None, progress=None, metrics=None, quizzes=False, backend='rest', store_path=None, selector=None):
     """
     Downloads and creates a TSV for Canvas Assignments
+    
+    With quizzes, the quizzes that are not assignments, like practice quizzes, get rows too.
+    backend is the way the Canvas object fetches the assignments, 'rest' or 'graphql'.
+    With a cache_dir, responses are cached on disk and only refetched if they changed.
+    With a progress, the progress is reported to it and it can cancel the download.
+    With a metrics, every request is recorded in the RequestMetrics.
+    With a store_path, the course is also saved to the CourseStore in that file.
+    selector is the SectionSelector of the sections that get a column, the lab sections by default.
     """
-    #Function that actually creates the TSV
-    def create_Canvas_TSV(canvas, assignmentList, filename):
-        print('Creating TSV...', end='')
+    #create Canvas object to interface with Canvas
+    with Canvas(hostname, courseID, token, cache=openCache(cache_dir), progress=progress, metrics=metrics, backend=backend, section_selector=selector) as canvas:
+        store = openStore(store_path)
+        try:
+            downloadCourse(canvas, filename, quizzes, store)
+        finally:
+            if store is not None:
+                store.close()
+
+#downloads the assignments of the course of a Canvas object to a TSV, and to a CourseStore if one is given
+def downloadCourse(canvas, filename, quizzes=False, store=None):
+    #get the course assignments and then sort the list by the due dates and then write to TSV
+    assignments = getCourseAssignments(canvas, quizzes)
+    if store is not None:
+        store.saveCourse(canvas.courseID, canvas.getSectionDirectory(), assignments, canvas.base_url)
+    sortAssignments(assignments)
+    if canvas.progress is not None:
+        canvas.progress.start('Writing TSV', len(assignments))
+    create_Canvas_TSV(canvas.getSectionDirectory(), assignments, filename, canvas.progress)
+
+#the file the snapshot of a downloaded TSV is saved to
+def snapshotFile(filename):
+    return filename + '.snapshot.json'
+
+#the values of an assignment listing entry that are kept in the snapshot
+def snapshotRecord(assignment):
+    keepList = ['id', 'name', 'due_at', 'unlock_at', 'lock_at', 'published', 'muted', 'updated_at']
+    record = {}
+    for key in keepList:
+        record[key] = assignment.get(key)
+    record['overrides'] = Assignment.filterData([dict(o) for o in assignment.get('overrides') or []], ['id', 'due_at', 'course_section_id', 'title'])
+    return record
+
+#loads the snapshot of the last download of filename, None if there is none for the course
+def loadSnapshot(filename, courseID):
+    try:
+        with open(snapshotFile(filename), 'r') as file:
+            snapshot = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+    if snapshot.get('courseID') != str(courseID) or not os.path.exists(filename):
+        return None
+    return snapshot
+
+#saves the snapshot records of the downloaded assignments
+def saveSnapshot(filename, courseID, records):
+    snapshot = {'courseID': str(courseID), 'assignments': {}}
+    for record in records:
+        snapshot['assignments'][str(record['id'])] = record
+    with open(snapshotFile(filename), 'w') as file:
+        json.dump(snapshot, file)
+
+def updateTSVRows(sections, assignmentList, removed, filename):
+    """
+    Rewrites the rows of changed assignments in a TSV made by download
+    
+    Rows of other assignments are kept as they are, including their order and any
+    extra columns. New assignments are added to the end, removed ones are dropped.
+    Returns False without changing the file if the section columns no longer match.
+    
+    params:
+        sections: the SectionDirectory of the course
+        assignmentList: Assignment objects of the changed and new assignments
+        removed: Canvas IDs of assignments that no longer exist
+        filename: the TSV to update
+    """
+    headers, keys = tsvColumns(sections)
+    converters = {}
+    for header, converter in zip(headers, tsvConverters(keys)):
+        converters[header] = converter
+    
+    #writes a row in the same way as create_Canvas_TSV
+    def rowText(row):
+        text = io.StringIO()
+        tsvWriter(text).writerow(row)
+        return text.getvalue()[:-1]
+    
+    with open(filename, 'r') as file:
+        lines = file.read().split('\n')
+    header = next(csv.reader([lines[0]], delimiter='\t'))
+    
+    #the columns of the file must still be the columns of the course
+    if not set(headers).issubset(header):
+        return False
+    idCol = header.index('Canvas ID')
     
-        sections = canvas.getSections()
-        sections = Assignment.filterData(sections, ['name','id'])
+    changed = {}
+    for assignment in assignmentList:
+        changed[assignment.id] = assignment
+    
+    out = [lines[0]]
+    for line in lines[1:]:
+        row = next(csv.reader([line], delimiter='\t'), [])
+        try:
+            ID = int(row[idCol])
+        except (IndexError, ValueError): #blank or annotation lines are kept
+            out.append(line)
+            continue
         
-        sectionNames = []
-        sectionKeys = []
-        for section in sections:
-            if 'lab' in section['name'].lower():
-                sectionNames.append(section['name'])
-                sectionKeys.append(section['id'])
+        if ID in removed:
+            continue
+        if ID in changed:
+            assignment = changed.pop(ID)
+            row = row + [''] * (len(header) - len(row))
+            for idx, name in enumerate(header):
+                if name in converters:
+                    key, convert = converters[name]
+                    row[idx] = convert(assignment.get(key))
+            line = rowText(row)
+        out.append(line)
+    
+    #new assignments go at the end, before any trailing blank line
+    newLines = []
+    for assignment in changed.values():
+        row = []
+        for name in header:
+            if name in converters:
+                key, convert = converters[name]
+                row.append(convert(assignment.get(key)))
+            else:
+                row.append('')
+        newLines.append(rowText(row))
+    end = len(out)
+    while end > 1 and out[end-1] == '':
+        end -= 1
+    out[end:end] = newLines
+    
+    with open(filename, 'w') as file:
+        file.write('\n'.join(out))
+    return True
+
+def downloadIncremental(hostname, courseID, token, filename, cache_dir=None, metrics=None, selector=None):
+    """
+    Updates a TSV made by a previous download, only refetching what changed
+    
+    A snapshot of the download is kept next to the TSV. The assignment listing is
+    fetched without overrides, and overrides are only fetched for assignments whose
+    updated_at moved since the snapshot. Only the rows of those assignments are
+    rewritten. Without a snapshot, the whole TSV is downloaded.
+    selector is the SectionSelector of the sections that get a column.
+    """
+    snapshot = loadSnapshot(filename, courseID)
+    
+    with Canvas(hostname, courseID, token, cache=openCache(cache_dir), metrics=metrics, section_selector=selector) as canvas:
+        sections = canvas.getSectionDirectory()
         
-        #Create the headers
-        headers = sectionNames
-        headers.insert(0, "Title")
-        headers += ["Available from", "Available until", "Published", "Muted", "Canvas ID"]
+        if snapshot is None:
+            print('No snapshot of', filename, '- downloading everything')
+            print('Getting assignments...', end='')
+            quizzes, assignments = canvas.getAllAssignments()
+            print(' Done')
+            records = [snapshotRecord(a) for a in assignments]
+            assignments = makeAssignments(canvas, assignments, sections)
+            sortAssignments(assignments)
+            create_Canvas_TSV(sections, assignments, filename)
+            saveSnapshot(filename, courseID, records)
+            return
         
-        #create a key for each header
-        keys = sectionKeys
-        keys.insert(0, 'name')
-        keys +=['unlock_at', 'lock_at','published', 'muted','id']
+        print('Getting assignment listing...', end='')
+        url = canvas.base_url + 'courses/' + canvas.courseID + '/assignments?all_dates=1'
+        listing = list(canvas.paginate(url))
+        print(' Done')
         
-        headerKeys= {}
-        for x in range(len(headers)):
-            headerKeys[headers[x]] = keys[x]
+        #only refetch the overrides of assignments that moved since the snapshot
+        records = []
+        changed = []
+        for assignment in listing:
+            old = snapshot['assignments'].get(str(assignment['id']))
+            if old is not None and old['updated_at'] == assignment.get('updated_at'):
+                records.append(old)
+            else:
+                assignment['overrides'] = canvas.getAssignmentOverrides(assignment['id'])
+                records.append(snapshotRecord(assignment))
+                changed.append(assignment)
         
-        #this is the pattern for a date
-        datetime_pattern = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]T[0-9][0-9]:[0-9][0-9]:[0-9][0-9]Z'
+        removed = set()
+        for ID in snapshot['assignments']:
+            removed.add(int(ID))
+        for assignment in listing:
+            removed.discard(assignment['id'])
         
-        #Add headers
-        string = ''
-        for header in headers:
-            string+=header +"\t"
-        string = string[:-1]+'\n'
+        print(len(changed), 'changed and', len(removed), 'removed assignments')
+        assignmentList = makeAssignments(canvas, changed, sections)
         
-        #add the asisgnments
-        for assignment in assignmentList:
-            for header in headers:
-                addition = str(assignment.get(headerKeys[header]))
-                if addition.lower() == 'none':
-                    addition = ''
-                if re.search(datetime_pattern, addition):
-                    addition = iso_to_local(addition)
-                string+= addition + '\t'
-            string = string[:-1]+'\n'
-        
-        #write everything to a file
-        with open(filename,'w') as file:
-            file.write(string)
-        print('Done')
+        if not updateTSVRows(sections, assignmentList, removed, filename):
+            #the sections changed, so every row needs to be rewritten
+            print('Sections changed - downloading everything')
+            quizzes, assignments = canvas.getAllAssignments()
+            records = [snapshotRecord(a) for a in assignments]
+            assignments = makeAssignments(canvas, assignments, sections)
+            sortAssignments(assignments)
+            create_Canvas_TSV(sections, assignments, filename)
+        saveSnapshot(filename, courseID, records)
+
+def readAssignmentRows(tsvfile, sections):
+    """
+    Reads the rows of a TSV file made by download
     
-    #create Canvas object to interface with Canvas
-    canvas = Canvas(hostname, courseID, token)
+    Yields the Canvas ID of each row, a dictionary of the new values in the
+    format used by Assignment.compare, and whether all sections share one due date.
+    The dictionary also has the line number of the row in the file as 'row'.
+    Rows are read from the file one at a time as they are asked for, so a row
+    can be uploaded while the rest of the file is still being read.
     
-    #get the course assignments and then sort the list by the due dates and then write to TSV
-    assignments = getCourseAssignments(canvas)
-    random_section = random.choice(list(assignments[0].sections.keys()))
-    assignments.sort(key=lambda assignment: assignment.get(random_section), reverse=False)
-    create_Canvas_TSV(canvas, assignments, filename)
+    params:
+        tsvfile: the opened TSV file
+        sections: the SectionDirectory of the course
+    """
+    data = csv.reader(tsvfile, delimiter='\t')
+    
+    #finds the headers
+    headerCol = {}
+    for idx, entry in enumerate(next(data)):
+        headerCol[entry] = idx
+    
+    #the column of each selected section, found by its exact name
+    sectionCols = []
+    for section in sections.labs():
+        if section['name'] not in headerCol:
+            raise ValueError('The TSV has no column for section ' + section['name'])
+        sectionCols.append((section['id'], headerCol[section['name']]))
+    
+    #the columns are looked up once, not for every row
+    titleCol = headerCol['Title']
+    mutedCol = headerCol['Muted']
+    publishedCol = headerCol['Published']
+    lockCol = headerCol['Available until']
+    unlockCol = headerCol['Available from']
+    idCol = headerCol['Canvas ID']
+    
+    #each date column finds its format once
+    sectionConverters = {}
+    for section, col in sectionCols:
+        sectionConverters[section] = LocalColumn()
+    lockConverter = LocalColumn()
+    unlockConverter = LocalColumn()
+    
+    for row in data:
+        #skip blank lines
+        if not row:
+            continue
+        
+        #get the section due dates and save them individually
+        section_due_dates = {}
+        for section, col in sectionCols:
+            section_due_dates[section]=sectionConverters[section](row[col])
+            
+        #if all the section due dates are the same, set the due_date to the same, otherwise, don't have a valid due date
+        if len(set(section_due_dates.values())) <= 1:
+            due_date = str(list(section_due_dates.values())[0]) 
+            
+            #remove all section due dates since they are all the same
+            for section in section_due_dates:
+                section_due_dates[section] = '' 
+            single_due_date = True
+        else:
+            due_date = ''
+            single_due_date = False
+        
+        #create a dictionary for the newly updated section from canvas
+        newAssignment = {'name': str(row[titleCol]), 'due': local_to_iso(due_date), 'muted': bool(int(row[mutedCol])), 'published':bool(int(row[publishedCol])), 'sections':section_due_dates, 'lock':lockConverter(row[lockCol]), 'unlock':unlockConverter(row[unlockCol]), 'row': data.line_num}
+        
+        yield rowId(row[idCol]), newAssignment, single_due_date
+
+#the Canvas ID of a TSV row, quizzes without an assignment keep their quizRowId
+def rowId(text):
+    text = text.strip()
+    if quizId(text) is not None:
+        return text
+    return int(text)
+
+#true if a TSV file has rows for quizzes without an assignment
+def hasQuizRows(filename):
+    with open(filename) as tsvfile:
+        return any('\tquiz:' in line for line in tsvfile)
+
+#makes the override payload of a section for the new assignment values
+def overridePayload(section, newAssignment):
+    return {'assignment_override':{'course_section_id': section, 'due_at': newAssignment['sections'][section], 'lock_at': newAssignment['lock'], 'unlock_at': newAssignment['unlock']}}
 
-def upload(hostname, courseID, token, filename):
+#makes the payload that edits the assignment to the new assignment values
+def assignmentPayload(newAssignment):
+    return {'assignment':{'name':newAssignment['name'], 'due_at':newAssignment['due'], 'muted':newAssignment['muted'], 'published':newAssignment['published'], 'lock_at': newAssignment['lock'], 'unlock_at': newAssignment['unlock']}}
+
+#makes the payload that edits a quiz without an assignment to the new values
+def quizPayload(newAssignment):
+    return {'quiz':{'title':newAssignment['name'], 'due_at':newAssignment['due'], 'published':newAssignment['published'], 'lock_at': newAssignment['lock'], 'unlock_at': newAssignment['unlock']}}
+
+#message for section dates of a quiz without an assignment, their overrides can not be edited through the API
+def quizSectionsMessage(oldAssignment, comp):
+    if not comp['sections']:
+        print('--> Quiz: "' + oldAssignment.name + '" section due dates not updated, they can only be changed in Canvas')
+
+def planOverrides(oldAssignment, newAssignment, single_due_date, comp=None):
     """
-    Uploads a TSV file with Canvas assignments to Canvas
+    Plans the override changes that turn the overrides of oldAssignment into the new section dates
+    
+    Returns a list of (action, section, overrideID, payload) where action is 'create',
+    'update' or 'delete'. Sections that are already correct get no operation, and
+    nothing is planned if only assignment level fields changed.
+    
+    params:
+        oldAssignment: the Assignment object currently on Canvas
+        newAssignment: dictionary of the values read from the TSV
+        single_due_date: True if every section has the same due date
+        comp: result of oldAssignment.compare(newAssignment), computed if not given
     """
+    if comp is None:
+        comp = oldAssignment.compare(newAssignment)
     
-    def getHeaders(row):
-        headerCol = {}
-        for idx, entry in enumerate(row):
-            headerCol[entry] = idx
+    #quizzes without an assignment have no assignment overrides to change
+    if quizId(oldAssignment.id) is not None:
+        return []
     
-        return headerCol
+    #overrides carry the lock and unlock dates, so those changing also touches every override
+    if comp['sections'] and comp['lock'] and comp['unlock']:
+        return []
+    datesChanged = not (comp['lock'] and comp['unlock'])
     
+    plan = []
+    section_due_dates = newAssignment['sections']
+    for section in oldAssignment.sectionIds():
+        overrideID = oldAssignment.overrideId(section)
+        date = section_due_dates.get(section)
+        wanted = not single_due_date and date != None and date != ''
+        
+        if overrideID is None:
+            if wanted:
+                plan.append(('create', section, None, overridePayload(section, newAssignment)))
+        elif not wanted:
+            plan.append(('delete', section, overrideID, None))
+        elif oldAssignment.sectionDate(section) != date or datesChanged:
+            plan.append(('update', section, overrideID, overridePayload(section, newAssignment)))
+    
+    return plan
+
+#makes one planned override change, printing an error message if it failed
+def applyOverride(canvas, oldAssignment, action, section, overrideID, payload):
+    if action == 'create':
+        result = canvas.makeAssignmentOverride(oldAssignment.id, payload)
+    elif action == 'update':
+        result = canvas.editAssignmentOverride(oldAssignment.id, overrideID, payload)
+    else:
+        result = canvas.deleteAssignmentOverride(oldAssignment.id, overrideID)
+    if result == None: #prints error message if nothing returned
+        print('--> Assignment: "'+oldAssignment.name + '" due date for section "' + oldAssignment.sectionName(section) + '" not updated')
+    return result
+
+class OverrideBatch():
+    def __init__(self, canvas):
+        """
+        Collects the override changes of an upload and sends them in batches
+        
+        Creates and updates of any assignments are sent with the batch override
+        endpoints, once override_batch_limit of them are collected or when a thread
+        waits for its own. The threads of an upload share one, so the overrides of
+        the assignments being updated at the same time go out together. Canvas has
+        no batch delete, deletes are made one at a time by the caller. Canvas makes
+        all overrides of a batch or none, so the overrides of a batch that failed
+        are sent again one at a time to find the ones in error.
+        Batches are sent even if the work was cancelled, so flush has to be called
+        once the rows are done, also when they failed.
+        """
+        self.canvas = canvas
+        self.lock = threading.Lock()
+        self.pending = {'create': [], 'update': []}
+    
+    #adds a planned create or update of an override, returns an Event that is set once it was sent
+    def add(self, oldAssignment, action, section, overrideID, payload):
+        sent = threading.Event()
+        sent.failed = False
+        override = dict(payload['assignment_override'])
+        override['assignment_id'] = oldAssignment.id
+        if action == 'update':
+            override['id'] = overrideID
+            del override['course_section_id']
+        
+        with self.lock:
+            pending = self.pending[action]
+            pending.append((oldAssignment, section, overrideID, payload, override, sent))
+            if len(pending) < override_batch_limit:
+                return sent
+            self.pending[action] = []
+        self.send(action, pending)
+        return sent
+    
+    #sends a batch of creates or updates and sets their events, marked failed if the batch raised
+    def send(self, action, changes):
+        overrides = [change[4] for change in changes]
+        failed = True
+        try:
+            with self.canvas.uncancelled():
+                if action == 'create':
+                    results = self.canvas.makeAssignmentOverrides(overrides)
+                else:
+                    results = self.canvas.editAssignmentOverrides(overrides)
+                
+                for change, result in zip(changes, results):
+                    if result is None:
+                        oldAssignment, section, overrideID, payload, override, sent = change
+                        applyOverride(self.canvas, oldAssignment, action, section, overrideID, payload)
+            failed = False
+        finally:
+            for change in changes:
+                change[5].failed = failed
+                change[5].set()
+    
+    #sends the changes that are still collected
+    def flush(self):
+        with self.lock:
+            pending = self.pending
+            self.pending = {'create': [], 'update': []}
+        for action in ['create', 'update']:
+            if pending[action]:
+                self.send(action, pending[action])
+    
+    #sends the collected changes and waits until the given ones were sent, by this thread or another
+    def wait(self, sent):
+        self.flush()
+        for event in sent:
+            event.wait()
+            if event.failed:
+                raise RuntimeError('The overrides of the assignment were not sent')
+
+def updateAssignment(canvas, oldAssignment, newAssignment, single_due_date, comp=None, batch=None):
+    """
+    Makes the override changes planned by planOverrides and edits the assignment
+    
+    The new and changed overrides are made first, then the assignment is edited, and
+    the overrides that are no longer wanted are deleted last, so the sections always
+    have a due date. With a batch, the thread waits for the overrides it added to
+    be sent before editing. A cancel does not cut the changes of the assignment off
+    part way, it stops the upload before the next row.
+    
+    params:
+        canvas: a Canvas object
+        oldAssignment: the Assignment object currently on Canvas
+        newAssignment: dictionary of the values read from the TSV
+        single_due_date: True if every section has the same due date
+        comp: result of oldAssignment.compare(newAssignment), computed if not given
+        batch: an OverrideBatch the override changes are added to instead of being sent
+    """
+    quizID = quizId(oldAssignment.id)
+    if quizID is not None:
+        quizSectionsMessage(oldAssignment, comp or oldAssignment.compare(newAssignment))
+        canvas.editQuiz(quizID, quizPayload(newAssignment))
+        print('Quiz updated:', oldAssignment.name)
+        return
+    
+    with canvas.uncancelled():
+        deletes = []
+        sent = []
+        for action, section, overrideID, payload in planOverrides(oldAssignment, newAssignment, single_due_date, comp):
+            if action == 'delete':
+                deletes.append((action, section, overrideID, payload))
+            elif batch is None:
+                applyOverride(canvas, oldAssignment, action, section, overrideID, payload)
+            else:
+                sent.append(batch.add(oldAssignment, action, section, overrideID, payload))
+        if batch is not None:
+            batch.wait(sent)
+        
+        #update the whole assignment
+        canvas.editAssignment(oldAssignment.id, assignmentPayload(newAssignment))
+        
+        #the sections of deleted overrides fall back to the new dates of the assignment
+        for action, section, overrideID, payload in deletes:
+            applyOverride(canvas, oldAssignment, action, section, overrideID, payload)
+    print('Assignment updated:', oldAssignment.name)
+
+def upload(hostname, courseID, token, filename, workers=1, cache_dir=None, progress=None, metrics=None, quizzes=None, bulk=False, batch=True, backend='rest', store_path=None, selector=None):
+    """
+    Uploads a TSV file with Canvas assignments to Canvas
+    
+    With workers greater than 1, changed assignments are updated in parallel by
+    that many threads. The updates of a single assignment stay in order.
+    With a cache_dir, responses are cached on disk and only refetched if they changed.
+    With a progress, the progress is reported to it and it can cancel the upload.
+    With a metrics, every request is recorded in the RequestMetrics.
+    quizzes is whether the quizzes are fetched, by default only if the TSV has quiz rows.
+    With bulk, the dates are updated with bulk_update jobs, see uploadCourseBulk.
+    With batch, the override changes of all rows are collected in an OverrideBatch.
+    backend is the way the Canvas object fetches the assignments, 'rest' or 'graphql'.
+    With a store_path, the old assignments are read from the CourseStore in that
+    file, see oldAssignments, and the store is updated after the upload.
+    selector is the SectionSelector the TSV was downloaded with, the lab sections by default.
+    """
     #Create Canvas object to interface with Canvas
-    canvas = Canvas(hostname, courseID, token)
+    with Canvas(hostname, courseID, token, pool_size=max(10, workers), cache=openCache(cache_dir), progress=progress, metrics=metrics, backend=backend, section_selector=selector) as canvas:
+        store = openStore(store_path)
+        try:
+            if bulk:
+                return uploadCourseBulk(canvas, filename, quizzes=quizzes, store=store)
+            return uploadCourse(canvas, filename, workers, quizzes, batch, store)
+        finally:
+            if store is not None:
+                store.close()
+
+def oldAssignments(canvas, filename, quizzes=None, store=None):
+    """
+    Gets the assignments a TSV file is compared to
+    
+    Without a store, or if the TSV has rows that are not in the snapshot of the
+    course, all assignments are fetched from Canvas. Otherwise the TSV is compared to
+    the snapshot with CourseStore.diff and only the changed assignments are loaded
+    from the store, without any requests.
+    Returns a dictionary of Canvas ID to Assignment object and the Canvas IDs of
+    the changed rows, which is None if every row has to be compared.
+    """
+    if quizzes is None:
+        quizzes = hasQuizRows(filename)
+    
+    changed = None
+    if store is not None and store.hasCourse(canvas.courseID):
+        if not store.hasCourse(canvas.courseID, canvas.sectionSelector):
+            print('The snapshot was saved with other sections picked, comparing with Canvas')
+        else:
+            changed = diffSnapshot(store, canvas.courseID, filename, canvas.sectionSelector)
+            if any('new' in changes for changes in changed.values()):
+                print('The TSV has rows that are not in the snapshot, comparing with Canvas')
+                changed = None
+    
+    if changed is None:
+        assignments = getCourseAssignments(canvas, quizzes)
+    else:
+        canvas.sectionDirectory = store.loadSections(canvas.courseID, canvas.sectionSelector)
+        ids = [ID for ID in changed if 'removed' not in changed[ID]]
+        assignments = store.loadAssignments(canvas.courseID, canvas, canvas.sectionDirectory, ids)
+        changed = set(ids)
     
-    #Get all the old assignments and create a dictionary to access them
-    oldAssignments = getCourseAssignments(canvas)
     oldDict = {}
+    for assignment in assignments:
+        oldDict[assignment.id] = assignment
+    return oldDict, changed
+
+#saves the course after an upload to the store, the section directory is refetched with it
+def refreshStore(canvas, store, quizzes):
+    canvas.invalidateSections()
+    store.saveCourse(canvas.courseID, canvas.getSectionDirectory(), getCourseAssignments(canvas, quizzes), canvas.base_url)
+
+def tsvRows(tsvfile, sections):
+    """
+    Reads the rows of a TSV file made by download in the format of CourseStore.diff
+    
+    Unlike readAssignmentRows, the section dates are kept as they are in the TSV.
+    Returns the rows and the IDs of the sections with a column.
+    
+    params:
+        tsvfile: the opened TSV file
+        sections: the SectionDirectory of the course
+    """
+    data = csv.reader(tsvfile, delimiter='\t')
+    headers = next(data)
+    headerCol = dict((header, idx) for idx, header in enumerate(headers))
+    sectionCols = [(section['id'], headerCol[section['name']]) for section in sections.labs() if section['name'] in headerCol]
+    converters = dict((col, LocalColumn()) for section, col in sectionCols)
+    lockConverter = LocalColumn()
+    unlockConverter = LocalColumn()
+    
+    rows = []
+    for row in data:
+        if not row:
+            continue
+        dates = dict((section, converters[col](row[col])) for section, col in sectionCols)
+        rows.append((rowId(row[headerCol['Canvas ID']]), row[headerCol['Title']],
+                     unlockConverter(row[headerCol['Available from']]), lockConverter(row[headerCol['Available until']]),
+                     int(row[headerCol['Published']]), int(row[headerCol['Muted']]), dates))
+    return rows, [section for section, col in sectionCols]
+
+#compares a TSV to the snapshot of a course in a CourseStore, see CourseStore.diff
+def diffSnapshot(store, courseID, filename, selector=None):
+    with open(filename) as tsvfile:
+        rows, sectionIds = tsvRows(tsvfile, store.loadSections(courseID, selector))
+    return store.diff(courseID, rows, sectionIds)
+
+def uploadCourse(canvas, filename, workers=1, quizzes=None, batch=True, store=None):
+    """
+    Uploads a TSV file to the course of a Canvas object
     
+    With batch, the override changes are sent in batches across rows instead of a
+    request per section, see OverrideBatch.
+    With a store, only the rows that changed since the snapshot are compared.
+    Returns the new values read for each assignment and the old Assignment objects.
+    """
+    if quizzes is None:
+        quizzes = hasQuizRows(filename)
+    
+    #Get the old assignments in a dictionary to access them
+    oldDict, changed = oldAssignments(canvas, filename, quizzes, store)
     print('Uploading new Assignments...')
-    for assignment in oldAssignments:
-        oldDict[assignment.id]=assignment
     
-    #read in the file
+    #each row of the file is a step of the progress
+    progress = canvas.progress
+    if progress is not None:
+        with open(filename) as tsvfile:
+            rows = sum(1 for line in tsvfile if line.strip()) - 1
+        progress.start('Uploading', rows)
+    
+    newAssignments ={}
+    
+    #override changes collected across rows
+    overrideBatch = OverrideBatch(canvas) if batch else None
+    
+    #worker pool for parallel uploads and the assignment each update belongs to
+    pool = None
+    futures = {}
+    if workers > 1:
+        pool = ThreadPoolExecutor(max_workers=workers)
+    
+    #read in the file, the batch is sent whatever happens to the rows so no row is left half changed
+    try:
+        uploadRows(canvas, filename, oldDict, changed, newAssignments, overrideBatch, pool, futures)
+        
+        #wait for the workers to finish and report the assignments that failed
+        if pool is not None:
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    print('--> Assignment: "' + futures[future].name + '" not updated:', future.exception())
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if overrideBatch is not None:
+            overrideBatch.flush()
+    if progress is not None:
+        progress.check()
+    if store is not None:
+        refreshStore(canvas, store, quizzes)
+    print('Done')
+    return newAssignments, oldDict
+
+#compares the rows of a TSV to the old assignments and updates the changed ones, see uploadCourse
+def uploadRows(canvas, filename, oldDict, changed, newAssignments, overrideBatch, pool, futures):
+    progress = canvas.progress
     with open(filename) as tsvfile:
-        data = csv.reader(tsvfile, delimiter='\t')
-        
-        #finds the headers
-        headerCol = getHeaders(next(data))
-
-        #finds the headers for individual sections        
-        sections = canvas.getSections()
-        sectionDict = {}
-        for section in sections:
-            if 'lab' in section['name'].lower():
-                sectionDict[section['id']] = section['name']
-        
-        sectionHeaders = {}
-        for idx, header in enumerate(headerCol):
-            for section in sections:
-                if section['name'] in header:
-                    sectionHeaders[section['id']] = idx
-                    break
-        
-        #update section headers into the headerCols dictionary
-        headerCol.update(sectionHeaders) 
-    
-        newAssignments ={}
-        
-        for idx, row in enumerate(data):            
-            #get the section due dates and save them individually
-            section_due_dates = {}
-            for section in sectionDict:
-                section_due_dates[section]=local_to_iso(row[headerCol[section]])
-                
-            #if all the section due dates are the same, set the due_date to the same, otherwise, don't have a valid due date
-            if len(set(section_due_dates.values())) <= 1:
-                due_date = str(list(section_due_dates.values())[0]) 
-                
-                #remove all section due dates since they are all the same
-                for section in section_due_dates:
-                    section_due_dates[section] = '' 
-                single_due_date = True
-            else:
-                due_date = ''
-                single_due_date = False
-                
+        for ID, newAssignment, single_due_date in readAssignmentRows(tsvfile, canvas.getSectionDirectory()):
+            #stop between rows if the upload was cancelled
+            if progress is not None:
+                progress.check()
             
-            #create a dictionary for the newly updated section from canvas
-            newAssignment = {'name': str(row[headerCol['Title']]), 'due': local_to_iso(due_date), 'muted': bool(int(row[headerCol['Muted']])), 'published':bool(int(row[headerCol['Published']])), 'sections':section_due_dates, 'lock':local_to_iso(row[headerCol['Available until']]), 'unlock':local_to_iso(row[headerCol['Available from']])}
+            #rows that are the same as the snapshot are not compared
+            if changed is not None and ID not in changed:
+                if progress is not None:
+                    progress.step()
+                continue
             
             #compare the new assignment with the new assignment
-            oldAssignment = oldDict[int(row[headerCol['Canvas ID']])]
+            oldAssignment = oldDict[ID]
             comp = oldAssignment.compare(newAssignment)
             
             newAssignments[oldAssignment.id]=newAssignment #makes a dictionary of changes for easy debugging
             
-           #if anything is different in new assignment, update the assignment
+            #if anything is different in new assignment, update the assignment
             if False in comp.values():
-                #delete all overrides so you can make new ones
-                oldAssignment.deleteOverrides()                                                                                                                                                           
+                if pool is None:
+                    updateAssignment(canvas, oldAssignment, newAssignment, single_due_date, comp, overrideBatch)
+                else:
+                    future = pool.submit(updateAssignment, canvas, oldAssignment, newAssignment, single_due_date, comp, overrideBatch)
+                    futures[future] = oldAssignment
+                    if progress is not None:
+                        future.add_done_callback(lambda future: progress.step())
+                        continue
+            if progress is not None:
+                progress.step()
+
+def planUpload(canvas, filename, quizzes=None, store=None):
+    """
+    Plans the upload of a TSV file without changing anything on Canvas
+    
+    Returns (oldAssignment, comp, plan) for each assignment that would be updated,
+    where comp is the result of Assignment.compare and plan the override
+    operations from planOverrides. With a store, the snapshot is planned against.
+    """
+    oldDict, changed = oldAssignments(canvas, filename, quizzes, store)
+    
+    changes = []
+    with open(filename) as tsvfile:
+        for ID, newAssignment, single_due_date in readAssignmentRows(tsvfile, canvas.getSectionDirectory()):
+            if changed is not None and ID not in changed:
+                continue
+            oldAssignment = oldDict[ID]
+            comp = oldAssignment.compare(newAssignment)
+            if False in comp.values():
+                changes.append((oldAssignment, comp, planOverrides(oldAssignment, newAssignment, single_due_date, comp)))
+    return changes
+
+#%% bulk upload that updates the dates of many assignments with one request
+
+#most assignments sent in one bulk_update request
+bulk_chunk_size = 100
+
+def bulkDates(oldAssignment, newAssignment, plan, comp):
+    """
+    Makes the bulk_update entry of an assignment from the planned override updates
+    
+    Returns the entry and the operations of the plan that bulk_update can not do,
+    which are creating and deleting overrides. The entry is None if no dates changed.
+    """
+    dates = []
+    if not (comp['due'] and comp['lock'] and comp['unlock']):
+        dates.append({'base': True, 'due_at': newAssignment['due'], 'unlock_at': newAssignment['unlock'], 'lock_at': newAssignment['lock']})
+    
+    remaining = []
+    for action, section, overrideID, payload in plan:
+        if action == 'update':
+            override = payload['assignment_override']
+            dates.append({'id': overrideID, 'due_at': override['due_at'], 'unlock_at': override['unlock_at'], 'lock_at': override['lock_at']})
+        else:
+            remaining.append((action, section, overrideID, payload))
+    
+    if not dates:
+        return None, remaining
+    return {'id': oldAssignment.id, 'all_dates': dates}, remaining
+
+#makes the changes of an assignment that are not dates, which bulk_update can not do
+#returns the override deletes, which have to wait until the new dates of the assignment are set
+def updateOtherFields(canvas, oldAssignment, newAssignment, operations, comp, batch):
+    deletes = []
+    with canvas.uncancelled():
+        for action, section, overrideID, payload in operations:
+            if action == 'delete':
+                deletes.append((action, section, overrideID, payload))
+            else:
+                batch.add(oldAssignment, action, section, overrideID, payload)
+        
+        if not (comp['name'] and comp['muted'] and comp['published']):
+            canvas.editAssignment(oldAssignment.id, {'assignment':{'name':newAssignment['name'], 'muted':newAssignment['muted'], 'published':newAssignment['published']}})
+    return deletes
+
+def waitForProgress(canvas, job, delay=0.5, max_delay=10.0, timeout=600.0):
+    """
+    Polls a Progress object until its job is completed or failed
+    
+    The time between polls starts at delay and doubles up to max_delay.
+    Returns the last Progress object, which is still running if timeout seconds passed.
+    """
+    start = time.time()
+    while job is not None and job.get('workflow_state') not in ['completed', 'failed']:
+        if time.time() - start > timeout:
+            break
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+        if canvas.progress is not None:
+            canvas.progress.check()
+        job = canvas.getProgress(job['id'])
+    return job
+
+def bulkErrors(job, chunk):
+    """
+    Finds the error of each assignment of a bulk_update job
+    
+    Returns a dictionary of assignment ID to error message. Errors reported for an
+    assignment are given to it, and a job that failed without naming assignments
+    gives its message to every assignment of the chunk.
+    
+    params:
+        job: the last Progress object of the job, None if the request failed
+        chunk: the bulk_update entries sent
+    """
+    ids = [entry['id'] for entry in chunk]
+    if job is None:
+        return dict.fromkeys(ids, 'request failed')
+    if job.get('workflow_state') != 'failed':
+        if job.get('workflow_state') == 'completed':
+            return {}
+        return dict.fromkeys(ids, 'not finished, last state ' + str(job.get('workflow_state')))
+    
+    results = job.get('results') or {}
+    errors = results.get('errors') if isinstance(results, dict) else results
+    found = {}
+    if isinstance(errors, dict):
+        for ID, error in errors.items():
+            found[int(ID) if str(ID).isdigit() else ID] = error
+    elif isinstance(errors, list):
+        for error in errors:
+            if isinstance(error, dict) and 'assignment_id' in error:
+                found[error['assignment_id']] = error.get('errors', error)
+    
+    if not found:
+        return dict.fromkeys(ids, job.get('message') or 'job failed')
+    return found
+
+def uploadCourseBulk(canvas, filename, chunk_size=bulk_chunk_size, quizzes=None, store=None):
+    """
+    Uploads a TSV file to the course of a Canvas object, updating the dates in bulk
+    
+    The due, unlock, and lock dates of the assignments and their existing overrides
+    are sent to bulk_update chunk_size assignments at a time, and the jobs are polled
+    until they finish. Everything else, like names or new and removed overrides,
+    is changed with a request per change.
+    With a store, only the rows that changed since the snapshot are compared.
+    Returns the new values read for each assignment, the old Assignment objects,
+    and a dictionary of the TSV line number to the error of the rows that failed.
+    The overrides that are no longer wanted are deleted once the jobs are done, and
+    only for the assignments whose dates were updated.
+    """
+    if quizzes is None:
+        quizzes = hasQuizRows(filename)
+    
+    oldDict, changed = oldAssignments(canvas, filename, quizzes, store)
+    
+    print('Uploading new Assignments...')
+    progress = canvas.progress
+    if progress is not None:
+        progress.start('Uploading')
+    
+    newAssignments = {}
+    entries = []
+    deletes = {}
+    batch = OverrideBatch(canvas)
+    try:
+        with open(filename) as tsvfile:
+            for ID, newAssignment, single_due_date in readAssignmentRows(tsvfile, canvas.getSectionDirectory()):
+                if progress is not None:
+                    progress.check()
+                if changed is not None and ID not in changed:
+                    continue
+                oldAssignment = oldDict[ID]
+                comp = oldAssignment.compare(newAssignment)
+                newAssignments[oldAssignment.id] = newAssignment
+                if not False in comp.values():
+                    continue
+                
+                #quizzes without an assignment are not assignments to bulk_update
+                if quizId(ID) is not None:
+                    updateAssignment(canvas, oldAssignment, newAssignment, single_due_date, comp)
+                    continue
                 
-                #make a new override for each section
-                for section in oldAssignment.sections:
-                    if not single_due_date and section_due_dates[section] != None and section_due_dates[section] !='':
-                        payload = {'assignment_override':{'course_section_id': section, 'due_at': section_due_dates[section], 'lock_at': newAssignment['lock'], 'unlock_at': newAssignment['unlock']}}
-                        if canvas.makeAssignmentOverride(oldAssignment.id, payload) == None: #prints error message if nothing returned
-                            print('--> Assignment: "'+oldAssignment.name + '" due date for section "' + oldAssignment.sections[section]['name'] + '" not updated')                 
-                #update the whole assignment
-                payload = {'assignment':{'name':newAssignment['name'], 'due_at':newAssignment['due'], 'muted':newAssignment['muted'], 'published':newAssignment['published'], 'lock_at': newAssignment['lock'], 'unlock_at': newAssignment['unlock']}}
-                canvas.editAssignment(oldAssignment.id, payload)
-                print('Assignment updated:', oldAssignment.name)
+                plan = planOverrides(oldAssignment, newAssignment, single_due_date, comp)
+                entry, remaining = bulkDates(oldAssignment, newAssignment, plan, comp)
+                deletes[ID] = updateOtherFields(canvas, oldAssignment, newAssignment, remaining, comp, batch)
+                if entry is not None:
+                    entries.append(entry)
+    finally:
+        #the changes of the rows already read are sent even if the upload stopped
+        batch.flush()
+    if progress is not None:
+        progress.check()
+    
+    #start every chunk before waiting on any of them
+    jobs = []
+    for start in range(0, len(entries), chunk_size):
+        chunk = entries[start:start + chunk_size]
+        jobs.append((chunk, canvas.bulkUpdateAssignments(chunk)))
+    print('Updating the dates of', len(entries), 'assignments in', len(jobs), 'bulk updates')
+    
+    errors = {}
+    for chunk, job in jobs:
+        for ID, error in bulkErrors(waitForProgress(canvas, job), chunk).items():
+            if ID in oldDict:
+                row = newAssignments[ID]['row']
+                errors[row] = error
+                print('--> Row ' + str(row) + ': Assignment "' + oldDict[ID].name + '" dates not updated:', error)
+    
+    #the sections of the deleted overrides fall back to the new dates of their assignment
+    with canvas.uncancelled():
+        for ID, operations in deletes.items():
+            if newAssignments[ID]['row'] in errors:
+                continue
+            for action, section, overrideID, payload in operations:
+                applyOverride(canvas, oldDict[ID], action, section, overrideID, payload)
+    
+    #the jobs changed the assignments after the bulk_update requests invalidated the cache
+    if canvas.cache is not None and jobs:
+        canvas.cache.invalidate(canvas.base_url + 'courses/' + canvas.courseID + '/assignments')
+    if store is not None:
+        refreshStore(canvas, store, quizzes)
+    print('Done')
+    return newAssignments, oldDict, errors
+
+#%% watch mode that pushes the saved edits of a TSV to Canvas as they are made
+
+#seconds a TSV has to stay unchanged before a save is pushed
+watch_debounce = 0.5
+
+#seconds between checks of the TSV
+watch_interval = 0.2
+
+class TsvWatcher():
+    def __init__(self, canvas, filename, quizzes=None, batch=True, debounce=watch_debounce):
+        """
+        Pushes the rows of a TSV that change on each save to the course of a Canvas object
+        
+        The assignments of the course are fetched once and kept in memory, and the text
+        of every row is kept as it was last pushed. A save is pushed once the file has
+        not changed for debounce seconds. Only the rows whose text changed are compared
+        with the assignments in memory and updated, and then only those assignments are
+        fetched again. Changes made on Canvas while watching are not seen.
+        
+        params:
+            canvas: the Canvas object of the course, kept open while watching
+            filename: the TSV file made by download
+            quizzes: whether the quizzes are fetched, by default only if the TSV has quiz rows
+            batch: send the override changes in batches, see OverrideBatch
+            debounce: seconds the file has to stay unchanged before it is pushed
+        """
+        self.canvas = canvas
+        self.filename = filename
+        self.quizzes = quizzes
+        self.batch = batch
+        self.debounce = debounce
+        self.oldDict = {}
+        self.rows = {}
+        self.header = None
+        self.stamp = None
+        self.changedAt = None
+        self.stale = False
+    
+    def __repr__(self):
+        return "TSV Watcher: " + self.filename + ", " + str(len(self.oldDict)) + " assignments"
+    
+    #the modification time and size of the file, None while it is missing
+    def fileStamp(self):
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    #the header and the text of each row of the file by Canvas ID
+    def readRows(self):
+        with open(self.filename) as tsvfile:
+            data = csv.reader(tsvfile, delimiter='\t')
+            header = tuple(next(data))
+            idCol = header.index('Canvas ID')
+            rows = {}
+            for row in data:
+                if row:
+                    rows[rowId(row[idCol])] = tuple(row)
+        return header, rows
+    
+    #fetches all the assignments of the course
+    def reload(self):
+        self.oldDict = {}
+        for assignment in getCourseAssignments(self.canvas, self.quizzes):
+            self.oldDict[assignment.id] = assignment
+        self.stale = False
+    
+    #fetches the assignments of the course and pushes the rows that differ from them
+    def load(self):
+        if self.quizzes is None:
+            self.quizzes = hasQuizRows(self.filename)
+        self.stamp = self.fileStamp()
+        self.header, self.rows = self.readRows()
+        self.reload()
+        self.pushSave(set(self.rows), time.time())
+    
+    #fetches the assignments of the pushed rows again, so the next save is compared to Canvas
+    def refresh(self, ids):
+        if any(quizId(ID) is not None for ID in ids):
+            self.reload()
+            return
+        listing = self.canvas.getAssignmentsById(ids, fields=assignment_fields)
+        for assignment in makeAssignments(self.canvas, listing, self.canvas.getSectionDirectory()):
+            self.oldDict[assignment.id] = assignment
+    
+    def push(self, ids):
+        """
+        Compares the rows with the given Canvas IDs to the assignments in memory and updates them
+        
+        Returns the Canvas IDs of the assignments that were updated.
+        """
+        updated = []
+        overrideBatch = OverrideBatch(self.canvas) if self.batch else None
+        try:
+            with open(self.filename) as tsvfile:
+                for ID, newAssignment, single_due_date in readAssignmentRows(tsvfile, self.canvas.getSectionDirectory()):
+                    if ID not in ids:
+                        continue
+                    oldAssignment = self.oldDict.get(ID)
+                    if oldAssignment is None:
+                        print('--> Row ' + str(newAssignment['row']) + ': no assignment with Canvas ID', ID)
+                        continue
+                    comp = oldAssignment.compare(newAssignment)
+                    if False in comp.values():
+                        updateAssignment(self.canvas, oldAssignment, newAssignment, single_due_date, comp, overrideBatch)
+                        updated.append(ID)
+        finally:
+            #the rows already compared are sent even if a later row failed
+            if overrideBatch is not None:
+                overrideBatch.flush()
+        return updated
+    
+    #pushes the changed rows of a save and logs the time taken
+    def pushSave(self, ids, savedAt):
+        start = time.perf_counter()
+        sent = self.canvas.requestCount
+        updated = self.push(ids)
+        if updated:
+            self.refresh(updated)
+        seconds = time.perf_counter() - start
+        print('Pushed %d rows, %d assignments updated with %d requests in %.3f s, %.3f s after the save'
+              % (len(ids), len(updated), self.canvas.requestCount - sent, seconds, time.time() - savedAt))
+        return updated
+    
+    def check(self):
+        """
+        Checks the file once and pushes it if a save has settled
+        
+        Returns the Canvas IDs of the assignments that were updated, None if nothing was pushed.
+        """
+        stamp = self.fileStamp()
+        if stamp != self.stamp:
+            #the file is still being written, wait for it to settle
+            self.stamp = stamp
+            self.changedAt = time.perf_counter()
+            return None
+        if self.changedAt is None or stamp is None or time.perf_counter() - self.changedAt < self.debounce:
+            return None
+        self.changedAt = None
+        
+        try:
+            header, rows = self.readRows()
+        except (ValueError, IndexError, StopIteration) as error:
+            print('Could not read', self.filename + ':', error)
+            return None
+        
+        #a change of the columns changes every row
+        if header != self.header:
+            ids = set(rows)
+        else:
+            ids = set(ID for ID, row in rows.items() if self.rows.get(ID) != row)
+        if not ids:
+            return None
+        
+        #a push that failed part way left the assignments in memory behind Canvas
+        try:
+            if self.stale:
+                self.reload()
+            updated = self.pushSave(ids, stamp[0] / 1e9)
+        except Exception:
+            traceback.print_exc()
+            print('Could not push', self.filename, '- the rows are pushed again on the next save')
+            self.stale = True
+            return None
+        self.header, self.rows = header, rows
+        return updated
+    
+    def run(self, stop=None, interval=watch_interval):
+        """
+        Watches the file until stop, a threading.Event, is set or the watch is interrupted
+        """
+        self.load()
+        print('Watching', self.filename, '- press Ctrl+C to stop')
+        try:
+            while stop is None or not stop.is_set():
+                self.check()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        print('Stopped watching', self.filename)
+
+def watch(hostname, courseID, token, filename, cache_dir=None, metrics=None, quizzes=None, batch=True, backend='rest', selector=None, debounce=watch_debounce, stop=None):
+    """
+    Pushes the edits of a TSV file to Canvas every time it is saved, see TsvWatcher
+    
+    The Canvas object, its connections, and the assignments stay open between saves.
+    Runs until stop, a threading.Event, is set or Ctrl+C is pressed.
+    """
+    with Canvas(hostname, courseID, token, cache=openCache(cache_dir), metrics=metrics, backend=backend, section_selector=selector) as canvas:
+        watcher = TsvWatcher(canvas, filename, quizzes, batch, debounce)
+        watcher.run(stop)
+        return watcher
+
+#%% asyncio versions of getCourseAssignments, download, and upload using AsyncCanvas
+
+async def getCourseAssignmentsAsync(canvas, quizzes=False):
+    """
+    Gets the assignments from Canvas
+    
+    params:
+        canvas: an AsyncCanvas object
+        quizzes: also get the quizzes that are not assignments
+    """
+    print('Getting assignments...', end='')
+    quizList, assignments = await canvas.getAllAssignments(quizzes=quizzes)
+    sections = await canvas.getSectionDirectory()
+    print(' Done')
+    return makeAssignments(canvas, assignments, sections, quizList)
+
+async def downloadAsync(hostname, courseID, token, filename, concurrency=10, quizzes=False, selector=None):
+    """
+    Downloads and creates a TSV for Canvas Assignments with an AsyncCanvas
+    """
+    from AsyncCanvasAPI import AsyncCanvas
+    
+    async with AsyncCanvas(hostname, courseID, token, concurrency, selector) as canvas:
+        assignments = await getCourseAssignmentsAsync(canvas, quizzes)
+        sortAssignments(assignments)
+        create_Canvas_TSV(await canvas.getSectionDirectory(), assignments, filename)
+
+async def updateAssignmentAsync(canvas, oldAssignment, newAssignment, single_due_date, comp=None):
+    """
+    Makes the override changes planned by planOverrides and then edits the assignment with an AsyncCanvas
+    """
+    quizID = quizId(oldAssignment.id)
+    if quizID is not None:
+        quizSectionsMessage(oldAssignment, comp or oldAssignment.compare(newAssignment))
+        await canvas.editQuiz(quizID, quizPayload(newAssignment))
+        print('Quiz updated:', oldAssignment.name)
+        return
+    
+    for action, section, overrideID, payload in planOverrides(oldAssignment, newAssignment, single_due_date, comp):
+        if action == 'create':
+            result = await canvas.makeAssignmentOverride(oldAssignment.id, payload)
+        elif action == 'update':
+            result = await canvas.editAssignmentOverride(oldAssignment.id, overrideID, payload)
+        else:
+            result = await canvas.deleteAssignmentOverride(oldAssignment.id, overrideID)
+        if result == None: #prints error message if nothing returned
+            print('--> Assignment: "'+oldAssignment.name + '" due date for section "' + oldAssignment.sectionName(section) + '" not updated')
+    #update the whole assignment
+    await canvas.editAssignment(oldAssignment.id, assignmentPayload(newAssignment))
+    print('Assignment updated:', oldAssignment.name)
+
+async def uploadAsync(hostname, courseID, token, filename, concurrency=10, quizzes=None, selector=None):
+    """
+    Uploads a TSV file with Canvas assignments to Canvas with an AsyncCanvas
+    
+    Changed assignments are updated concurrently, at most concurrency requests
+    are in flight at once. The updates of a single assignment stay in order.
+    """
+    from AsyncCanvasAPI import AsyncCanvas
+    
+    async with AsyncCanvas(hostname, courseID, token, concurrency, selector) as canvas:
+        if quizzes is None:
+            quizzes = hasQuizRows(filename)
+        oldAssignments = await getCourseAssignmentsAsync(canvas, quizzes)
+        oldDict = {}
+        
+        print('Uploading new Assignments...')
+        for assignment in oldAssignments:
+            oldDict[assignment.id]=assignment
+        
+        newAssignments = {}
+        updated = []
+        tasks = []
+        
+        with open(filename) as tsvfile:
+            for ID, newAssignment, single_due_date in readAssignmentRows(tsvfile, await canvas.getSectionDirectory()):
+                oldAssignment = oldDict[ID]
+                comp = oldAssignment.compare(newAssignment)
+                newAssignments[oldAssignment.id]=newAssignment
+                
+                if False in comp.values():
+                    updated.append(oldAssignment)
+                    tasks.append(asyncio.ensure_future(updateAssignmentAsync(canvas, oldAssignment, newAssignment, single_due_date, comp)))
+                    
+                    #let the started updates send their requests while the next rows are read
+                    await asyncio.sleep(0)
+        
+        #report the assignments that failed
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for oldAssignment, result in zip(updated, results):
+            if isinstance(result, Exception):
+                print('--> Assignment: "' + oldAssignment.name + '" not updated:', result)
         print('Done')
         return newAssignments, oldDict
 
 #%% Main section of code that runs
 if __name__ == '__main__':
-    app = App(courseID, token)
+    defaults = loadDefaults()
+    app = App(defaults['courseID'], defaults['token'], defaults['hostname'])
 
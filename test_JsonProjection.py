@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the streaming projection of list responses, run with python -m unittest
+"""
+
+import json
+import time
+import unittest
+
+from JsonProjection import projectList
+from CanvasAPI import stream_chunk_size
+
+#splits the bytes of a response into the pieces iter_content would give
+def chunked(raw, size=stream_chunk_size):
+    return [raw[start:start + size] for start in range(0, len(raw), size)]
+
+class ListProjectionTest(unittest.TestCase):
+    def test_small_pieces(self):
+        items = [{'id': 1, 'name': 'a "quoted" {name}', 'description': 'x\\y', 'overrides': [{'id': 5, 'title': 't'}]},
+                 {'id': 2, 'name': 'ünï', 'rubric': [{'points': 1}], 'overrides': []}]
+        raw = json.dumps(items).encode()
+        fields = {'id': None, 'name': None, 'overrides': {'id': None}}
+        expected = [{'id': 1, 'name': 'a "quoted" {name}', 'overrides': [{'id': 5}]},
+                    {'id': 2, 'name': 'ünï', 'overrides': []}]
+        for size in range(1, 8):
+            self.assertEqual(list(projectList(chunked(raw, size), fields)), expected)
+
+    def test_object_larger_than_chunks(self):
+        #a description of 8 MB with escapes and braces, over a hundred chunks
+        description = '<p class="x">{' + 'a\\"b}' * (8 * 2**20 // 6) + '</p>'
+        items = [{'id': 1, 'description': description, 'name': 'big'}, {'id': 2, 'name': 'small'}]
+        chunks = chunked(json.dumps(items).encode())
+        self.assertGreater(len(chunks), 100)
+
+        start = time.perf_counter()
+        records = list(projectList(chunks, ['id', 'name']))
+        seconds = time.perf_counter() - start
+
+        self.assertEqual(records, [{'id': 1, 'name': 'big'}, {'id': 2, 'name': 'small'}])
+        #reading the object again from its start with every chunk takes minutes
+        self.assertLess(seconds, 5)
+
+    def test_incomplete(self):
+        for raw in [b'[{"id": 1}', b'[{"id": "1}]', b'{"id": 1}']:
+            with self.assertRaises(ValueError):
+                list(projectList(chunked(raw, 3), ['id']))
+
+if __name__ == '__main__':
+    unittest.main()